@@ -4,6 +4,11 @@ Animation example for panel_3dmol using 3Dmol.js setFrame functionality
 Demonstrates molecular dynamics, conformational changes, and trajectory visualization
 """
 
+import functools
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import panel as pn
 from panel_3dmol import Mol3DViewer
 import numpy as np
@@ -12,7 +17,41 @@ import numpy as np
 pn.extension('filedropper')
 pn.config.sizing_mode = 'stretch_width'
 
-def create_rotating_molecule_frames():
+# Each builder returns (symbols, coords) with coords one contiguous float32
+# (n_frames, natoms, 3) array; addTrajectory ships that buffer as-is, so no
+# per-frame XYZ text is ever built in Python.
+# pn.cache memoizes across sessions, so `panel serve` builds each frame set
+# once per process instead of every time a browser tab re-runs this script;
+# npz_cached also keeps the arrays on disk so a restarted server skips the builders.
+FRAMES_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frames_cache')
+
+def npz_cached(builder):
+    """Persist a builder's (symbols, coords) per set of arguments in FRAMES_CACHE_DIR
+
+    Delete the directory after changing a builder to rebuild its frames.
+    """
+    signature = inspect.signature(builder)
+
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = '_'.join(str(value) for value in bound.arguments.values())
+        path = os.path.join(FRAMES_CACHE_DIR, f'{builder.__name__}_{key}.npz')
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                return cached['symbols'].tolist(), cached['coords']
+        symbols, coords = builder(*args, **kwargs)
+        os.makedirs(FRAMES_CACHE_DIR, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, symbols=np.array(symbols), coords=coords)
+        os.replace(tmp_path, path)  # Readers never see a half-written file
+        return symbols, coords
+    return wrapper
+
+@pn.cache
+@npz_cached
+def create_rotating_molecule_frames(n_frames=20):
     """Create a simple rotating benzene molecule for animation demo"""
     
     # Base benzene structure
@@ -23,32 +62,28 @@ def create_rotating_molecule_frames():
         [0.0000, -1.3970, 0.0000],  # C4
         [-1.2098, -0.6985, 0.0000], # C5
         [-1.2098, 0.6985, 0.0000]   # C6
-    ])
-    
-    frames = []
-    n_frames = 20
-    
-    for i in range(n_frames):
-        # Rotate around Z-axis
-        angle = 2 * np.pi * i / n_frames
-        rotation_matrix = np.array([
-            [np.cos(angle), -np.sin(angle), 0],
-            [np.sin(angle), np.cos(angle), 0],
-            [0, 0, 1]
-        ])
-        
-        rotated_coords = base_coords @ rotation_matrix.T
-        
-        # Create XYZ format
-        xyz_frame = f"6\nFrame {i+1} - Rotating Benzene\n"
-        for j, coord in enumerate(rotated_coords):
-            xyz_frame += f"C    {coord[0]:.4f}    {coord[1]:.4f}    {coord[2]:.4f}\n"
-        
-        frames.append(xyz_frame)
-    
-    return frames
+    ], dtype=np.float32)
 
-def create_vibrating_molecule_frames():
+    # Build all Z-axis rotation matrices at once, shape (n_frames, 3, 3): one
+    # vectorized cos/sin call instead of trig (or a cumulative step matmul) per frame
+    angles = 2 * np.pi * np.arange(n_frames) / n_frames
+    c, s = np.cos(angles), np.sin(angles)
+    R = np.zeros((n_frames, 3, 3), dtype=np.float32)
+    R[:, 0, 0] = c
+    R[:, 0, 1] = -s
+    R[:, 1, 0] = s
+    R[:, 1, 1] = c
+    R[:, 2, 2] = 1
+
+    # Rotate every frame in a single call, written into one preallocated buffer
+    all_rotated = np.empty((n_frames,) + base_coords.shape, dtype=np.float32)
+    np.einsum('nij,kj->nki', R, base_coords, out=all_rotated)
+
+    return ['C'] * len(base_coords), all_rotated
+
+@pn.cache
+@npz_cached
+def create_vibrating_molecule_frames(n_frames=30):
     """Create vibrating molecule for animation demo"""
     
     # Water molecule base coordinates
@@ -56,58 +91,45 @@ def create_vibrating_molecule_frames():
         [0.000000, 0.000000, 0.119262],   # O
         [0.000000, 0.763239, -0.477047],  # H1
         [0.000000, -0.763239, -0.477047]  # H2
-    ])
+    ], dtype=np.float32)
     
-    frames = []
-    n_frames = 30
     symbols = ['O', 'H', 'H']
     
-    for i in range(n_frames):
-        # Create vibration effect
-        vibration = 0.1 * np.sin(2 * np.pi * i / n_frames)
-        
-        # Modify coordinates with vibration
-        vibrated_coords = base_coords.copy()
-        vibrated_coords[1, 1] += vibration  # H1 vibration
-        vibrated_coords[2, 1] -= vibration  # H2 vibration in opposite direction
-        
-        # Create XYZ format
-        xyz_frame = f"3\nFrame {i+1} - Vibrating Water\n"
-        for j, (symbol, coord) in enumerate(zip(symbols, vibrated_coords)):
-            xyz_frame += f"{symbol}    {coord[0]:.6f}    {coord[1]:.6f}    {coord[2]:.6f}\n"
-        
-        frames.append(xyz_frame)
+    # Vibration offsets for every frame at once, broadcast into one coordinate buffer
+    vibrations = (0.1 * np.sin(2 * np.pi * np.arange(n_frames) / n_frames)).astype(np.float32)
+    all_coords = np.broadcast_to(base_coords, (n_frames,) + base_coords.shape).copy()
+    all_coords[:, 1, 1] += vibrations  # H1 vibration
+    all_coords[:, 2, 1] -= vibrations  # H2 vibration in opposite direction
     
-    return frames
+    return symbols, all_coords
 
-def create_reaction_pathway_frames():
+@pn.cache
+@npz_cached
+def create_reaction_pathway_frames(n_frames=25):
     """Create frames showing a simple reaction pathway"""
     
-    frames = []
-    n_frames = 25
+    # Simulate bond breaking/forming
+    progress = np.arange(n_frames) / (n_frames - 1)
     
-    for i in range(n_frames):
-        # Simulate bond breaking/forming
-        progress = i / (n_frames - 1)
-        
-        # Start: H-H close together, End: H-H far apart
-        h1_x = -0.5 + progress * 1.0  # Move from -0.5 to 0.5
-        h2_x = 0.5 - progress * 1.0   # Move from 0.5 to -0.5
-        
-        xyz_frame = f"2\nFrame {i+1} - H2 Dissociation (progress: {progress:.2f})\n"
-        xyz_frame += f"H    {h1_x:.4f}    0.0000    0.0000\n"
-        xyz_frame += f"H    {h2_x:.4f}    0.0000    0.0000\n"
-        
-        frames.append(xyz_frame)
+    # Start: H-H close together, End: H-H far apart
+    all_coords = np.zeros((n_frames, 2, 3), dtype=np.float32)
+    all_coords[:, 0, 0] = -0.5 + progress * 1.0  # Move from -0.5 to 0.5
+    all_coords[:, 1, 0] = 0.5 - progress * 1.0   # Move from 0.5 to -0.5
     
-    return frames
+    return ['H', 'H'], all_coords
 
 # Create different animation examples
 print("Creating animation frames...")
 
-rotating_frames = create_rotating_molecule_frames()
-vibrating_frames = create_vibrating_molecule_frames()
-reaction_frames = create_reaction_pathway_frames()
+# The three builders are independent, so run them side by side
+with ThreadPoolExecutor(max_workers=3) as executor:
+    rotating_future = executor.submit(create_rotating_molecule_frames)
+    vibrating_future = executor.submit(create_vibrating_molecule_frames)
+    reaction_future = executor.submit(create_reaction_pathway_frames)
+
+rotating_symbols, rotating_frames = rotating_future.result()
+vibrating_symbols, vibrating_frames = vibrating_future.result()
+reaction_symbols, reaction_frames = reaction_future.result()
 
 print(f"Created {len(rotating_frames)} rotating frames")
 print(f"Created {len(vibrating_frames)} vibrating frames") 
@@ -115,19 +137,19 @@ print(f"Created {len(reaction_frames)} reaction frames")
 
 # Example 1: Rotating molecule
 viewer1 = Mol3DViewer(width=400, height=300)
-viewer1.addFrames(rotating_frames, 'xyz')
+viewer1.addTrajectory(rotating_symbols, rotating_frames)
 viewer1.setStyle({}, {'stick': {'radius': 0.1}, 'sphere': {'radius': 0.3}})
 viewer1.setBackgroundColor('white')
 
 # Example 2: Vibrating molecule  
 viewer2 = Mol3DViewer(width=400, height=300)
-viewer2.addFrames(vibrating_frames, 'xyz')
+viewer2.addTrajectory(vibrating_symbols, vibrating_frames)
 viewer2.setStyle({}, {'stick': {'radius': 0.15}, 'sphere': {'radius': 0.4}})
 viewer2.setBackgroundColor('lightgray')
 
 # Example 3: Reaction pathway
 viewer3 = Mol3DViewer(width=400, height=300)
-viewer3.addFrames(reaction_frames, 'xyz')
+viewer3.addTrajectory(reaction_symbols, reaction_frames)
 viewer3.setStyle({}, {'sphere': {'radius': 0.5}})
 viewer3.setBackgroundColor('black')
 
@@ -169,7 +191,8 @@ def setup_animation_controls(viewer, controls):
     
     # Frame slider control
     def update_frame(event):
-        viewer.setFrame(frame_slider.value)
+        # Watching value_throttled fires once on release instead of on every drag step
+        viewer.setFrame(event.new)
         
     # Play button
     def start_animation(event):
@@ -185,7 +208,7 @@ def setup_animation_controls(viewer, controls):
         viewer.setAnimationSpeed(speed_input.value)
     
     # Connect callbacks
-    frame_slider.param.watch(update_frame, 'value')
+    frame_slider.param.watch(update_frame, 'value_throttled')
     play_btn.on_click(start_animation)
     stop_btn.on_click(stop_animation)
     speed_input.param.watch(update_speed, 'value')
@@ -223,6 +246,7 @@ app = pn.Column(
     - **startAnimation(speed)**: Start animation playback  
     - **stopAnimation()**: Stop animation
     - **addFrames(structures)**: Load multiple structures as frames
+    - **addTrajectory(symbols, coords)**: Load a coordinate array as frames
     - **setAnimationSpeed(ms)**: Control playback speed
     
     **Use Cases:**
@@ -262,6 +286,8 @@ app = pn.Column(
     ```python
     # Load multiple frames
     viewer.addFrames(trajectory_frames, 'xyz')
+    # ...or a (n_frames, natoms, 3) coordinate array
+    viewer.addTrajectory(symbols, coords)
     
     # Control animation
     viewer.startAnimation(100)  # 100ms per frame
@@ -4,6 +4,7 @@ Updated dual molecular viewer with user-controlled labeling
 Shows how to add labels from user Python code, not hardcoded
 """
 
+import numpy as np
 import panel as pn
 import param
 from panel_3dmol import Mol3DViewer
@@ -30,76 +31,121 @@ uploaded_product = {
 }
 
 def count_atoms(file_content, file_ext):
-    """Count atoms in the molecular file"""
+    """Count atoms in the molecular file, given as text or as the uploaded bytes"""
+    if isinstance(file_content, (bytes, bytearray)):
+        newline, atom, hetatm, comment = b'\n', b'ATOM', b'HETATM', b'#'
+    else:
+        newline, atom, hetatm, comment = '\n', 'ATOM', 'HETATM', '#'
     try:
-        lines = [line.strip() for line in file_content.strip().split('\n') if line.strip()]
+        if file_ext == 'pdb':
+            # Count record starts with C-level str.count instead of a per-line loop
+            return (file_content.count(newline + atom) + file_content.count(newline + hetatm)
+                    + file_content.startswith((atom, hetatm)))
+
+        content = file_content.strip()
 
         if file_ext == 'xyz':
-            return int(lines[0]) if lines else 0
-        elif file_ext == 'pdb':
-            return len([line for line in lines if line.startswith(('ATOM', 'HETATM'))])
+            return int(content.split(newline, 1)[0]) if content else 0
         elif file_ext == 'sdf':
+            # Only the header is needed: the counts line is the 4th non-blank line
+            lines = [line for line in content.split(newline, 8)[:8] if line.strip()]
             if len(lines) >= 4:
                 counts_line = lines[3].split()
                 if len(counts_line) >= 2:
                     return int(counts_line[0])
         else:
-            return len([line for line in lines if line and not line.startswith('#')])
+            # Non-blank lines that are not # comments, counted without splitting
+            if not content:
+                return 0
+            return (content.count(newline) + 1 - content.count(newline + newline)
+                    - content.count(newline + comment) - content.startswith(comment))
     except:
         return "Unknown"
 
+def save_upload(filename, raw_content):
+    """Save an uploaded file locally and return its path"""
+    local_path = f"./{filename}"
+    if isinstance(raw_content, bytes):
+        # Write the uploaded bytes as-is rather than re-encoding the decoded text
+        with open(local_path, 'wb') as f:
+            f.write(raw_content)
+    else:
+        with open(local_path, 'w', encoding='utf-8') as f:
+            f.write(raw_content)
+    return local_path
+
 def add_atom_labels_to_viewer(viewer, structure_data, filetype):
     """
     User function to add atom labels - similar to py3dmol example
     User has complete control over when and how this is called
+    Returns the number of labels added
     """
     if not structure_data:
-        return
+        return 0
         
-    lines = structure_data.strip().split('\n')
+    lines = structure_data.strip().splitlines()
     
     if filetype == 'xyz' and len(lines) > 2:
         natoms = int(lines[0])
         atom_lines = lines[2:2 + natoms]
         
-        # User controls the labeling loop - exact same as py3dmol
-        for idx, line in enumerate(atom_lines):
-            parts = line.split()
-            if len(parts) >= 4:
-                symbol = parts[0]
-                x, y, z = map(float, parts[1:4])
-                
-                # User can customize label appearance
-                viewer.addLabel(str(idx + 1), {
-                    'position': {'x': x, 'y': y, 'z': z},
-                    'backgroundColor': 'white',
-                    'backgroundOpacity': 0,
-                    'fontColor': 'blue',
-                    'font': 'arial',
-                    'fontSize': 16,
-                    'fontOpacity': 1.0,
-                    'inFront': True
-                })
+        # Parse all coordinates in one call instead of splitting every line
+        try:
+            coords = np.loadtxt(atom_lines, usecols=(1, 2, 3), ndmin=2)
+            numbers = range(len(coords))
+        except ValueError:
+            # Skip truncated atom lines (fewer than 4 fields) but keep the atom numbering
+            numbers = [idx for idx, line in enumerate(atom_lines) if len(line.split()) >= 4]
+            if not numbers:
+                return 0
+            coords = np.loadtxt([atom_lines[idx] for idx in numbers], usecols=(1, 2, 3), ndmin=2)
+        
+        # User controls the labels - built in one list and sent in one update
+        viewer.addLabels([
+            # User can customize label appearance
+            {'text': str(idx + 1), 'options': {
+                'position': {'x': x, 'y': y, 'z': z},
+                'backgroundColor': 'white',
+                'backgroundOpacity': 0,
+                'fontColor': 'blue',
+                'font': 'arial',
+                'fontSize': 16,
+                'fontOpacity': 1.0,
+                'inFront': True
+            }}
+            for idx, (x, y, z) in zip(numbers, coords.tolist())
+        ])
+        return len(coords)
                 
     elif filetype == 'pdb':
-        atom_lines = [line for line in lines if line.startswith(('ATOM', 'HETATM'))]
+        atom_lines = [line for line in lines
+                      if line.startswith(('ATOM', 'HETATM')) and len(line) >= 54]
+        if not atom_lines:
+            return 0
         
-        for idx, line in enumerate(atom_lines):
-            if len(line) >= 54:
-                x = float(line[30:38].strip())
-                y = float(line[38:46].strip()) 
-                z = float(line[46:54].strip())
-                
-                viewer.addLabel(str(idx + 1), {
-                    'position': {'x': x, 'y': y, 'z': z},
-                    'backgroundColor': 'white',
-                    'backgroundOpacity': 0,
-                    'fontColor': 'red',  # Different color for PDB
-                    'font': 'arial',
-                    'fontSize': 14,
-                    'fontOpacity': 1.0,
-                    'inFront': True
-                })
+        # PDB coordinates live in fixed columns 31-38, 39-46 and 47-54
+        coords = np.genfromtxt(atom_lines,
+                               delimiter=(30, 8, 8, 8), usecols=(1, 2, 3), ndmin=2)
+        # Blank or misaligned coordinate fields come back as nan; leave those atoms unlabelled
+        numbers = np.flatnonzero(~np.isnan(coords).any(axis=1))
+        coords = coords[numbers]
+        
+        viewer.addLabels([
+            {'text': str(idx + 1), 'options': {
+                'position': {'x': x, 'y': y, 'z': z},
+                'backgroundColor': 'white',
+                'backgroundOpacity': 0,
+                'fontColor': 'red',  # Different color for PDB
+                'font': 'arial',
+                'fontSize': 14,
+                'fontOpacity': 1.0,
+                'inFront': True
+            }}
+            for idx, (x, y, z) in zip(numbers.tolist(), coords.tolist())
+        ])
+        return len(coords)
+    
+    return 0
 
 # Create viewers
 reactant_viewer = Mol3DViewer()
@@ -126,16 +172,17 @@ def on_reactant_drop(event):
     global uploaded_reactant
     if reactant_dropper.value:
         try:
-            filename, file_content = next(iter(reactant_dropper.value.items()))
-            if isinstance(file_content, bytes):
-                file_content = file_content.decode('utf-8', errors='ignore')
-
+            filename, raw_content = next(iter(reactant_dropper.value.items()))
             extension = filename.split('.')[-1].lower()
-            
+
             # Save file locally
-            local_path = f"./{filename}"
-            with open(local_path, 'w', encoding='utf-8') as f:
-                f.write(file_content)
+            local_path = save_upload(filename, raw_content)
+
+            # Load structure into viewer; uploaded bytes are sent to the browser as-is
+            reactant_viewer.addModel(raw_content, extension)
+            # addModel decoded the upload once; reuse that text so the labels and
+            # atom count match what the viewer shows
+            file_content = reactant_viewer.structure
 
             # Store file data
             uploaded_reactant = {
@@ -146,10 +193,6 @@ def on_reactant_drop(event):
                 'local_path': local_path
             }
 
-            # Load structure into viewer
-            reactant_viewer.filetype = extension
-            reactant_viewer.structure = file_content
-
             print(f"✅ Reactant {filename} loaded successfully as {extension.upper()}")
 
         except Exception as e:
@@ -159,16 +202,17 @@ def on_product_drop(event):
     global uploaded_product
     if product_dropper.value:
         try:
-            filename, file_content = next(iter(product_dropper.value.items()))
-            if isinstance(file_content, bytes):
-                file_content = file_content.decode('utf-8', errors='ignore')
-
+            filename, raw_content = next(iter(product_dropper.value.items()))
             extension = filename.split('.')[-1].lower()
 
             # Save file locally
-            local_path = f"./{filename}"
-            with open(local_path, 'w', encoding='utf-8') as f:
-                f.write(file_content)
+            local_path = save_upload(filename, raw_content)
+
+            # Load structure into viewer; uploaded bytes are sent to the browser as-is
+            product_viewer.addModel(raw_content, extension)
+            # addModel decoded the upload once; reuse that text so the labels and
+            # atom count match what the viewer shows
+            file_content = product_viewer.structure
 
             # Store file data
             uploaded_product = {
@@ -179,10 +223,6 @@ def on_product_drop(event):
                 'local_path': local_path
             }
 
-            # Load structure into viewer
-            product_viewer.filetype = extension
-            product_viewer.structure = file_content
-
             print(f"✅ Product {filename} loaded successfully as {extension.upper()}")
 
         except Exception as e:
@@ -196,12 +236,12 @@ def add_reactant_labels(event):
         reactant_viewer.removeAllLabels()
         
         # User function adds labels
-        add_atom_labels_to_viewer(
+        n_added = add_atom_labels_to_viewer(
             reactant_viewer, 
             uploaded_reactant['content'], 
             uploaded_reactant['format']
         )
-        print(f"🏷️ Added {len(reactant_viewer.labels)} labels to reactant")
+        print(f"🏷️ Added {n_added} labels to reactant")
     else:
         print("⚠️ No reactant structure loaded")
 
@@ -212,12 +252,12 @@ def add_product_labels(event):
         product_viewer.removeAllLabels()
         
         # User function adds labels
-        add_atom_labels_to_viewer(
+        n_added = add_atom_labels_to_viewer(
             product_viewer, 
             uploaded_product['content'], 
             uploaded_product['format']
         )
-        print(f"🏷️ Added {len(product_viewer.labels)} labels to product")
+        print(f"🏷️ Added {n_added} labels to product")
     else:
         print("⚠️ No product structure loaded")
 
@@ -237,13 +277,14 @@ clear_labels_btn.on_click(clear_all_labels)
 # Utility functions for programmatic control
 def sync_styles():
     """Copy all styles from reactant to product"""
-    product_viewer.show_stick = reactant_viewer.show_stick
-    product_viewer.show_sphere = reactant_viewer.show_sphere
-    product_viewer.show_cartoon = reactant_viewer.show_cartoon
-    product_viewer.show_line = reactant_viewer.show_line
-    product_viewer.show_surface = reactant_viewer.show_surface
-    product_viewer.background_color = reactant_viewer.background_color
-    product_viewer.render()
+    style_params = ['style_spec', 'show_stick', 'show_sphere', 'show_cartoon', 'show_line',
+                    'show_surface', 'background_color']
+    # Only send what differs, as one batched update; the style scripts
+    # re-render the viewer themselves, so no extra render() call is needed
+    changed = {name: getattr(reactant_viewer, name) for name in style_params
+               if getattr(product_viewer, name) != getattr(reactant_viewer, name)}
+    if changed:
+        product_viewer.param.update(**changed)
     print("🔄 Styles synchronized: Reactant → Product")
 
 # Create the app layout
@@ -4,22 +4,28 @@ Example showing how users can control labeling from Python code
 Direct equivalent to the py3dmol example provided
 """
 
+import numpy as np
 import panel as pn
 from panel_3dmol import Mol3DViewer
 
 # Enable Panel extensions
 pn.extension('filedropper')
 
-def visualize_xyz_with_labels(xyz_path, title='Molecule'):
+def visualize_xyz_with_labels(xyz_source, title='Molecule'):
     """
     Function equivalent to the py3dmol example - user controls everything from Python
+    xyz_source is either a path to an XYZ file or the XYZ text itself
     """
-    # Read the XYZ file
-    with open(xyz_path) as f:
-        xyz_data = f.read()
+    if '\n' in xyz_source:
+        # Already in memory - no need to round-trip through a file
+        xyz_data = xyz_source
+    else:
+        # Read the XYZ file
+        with open(xyz_source) as f:
+            xyz_data = f.read()
 
     # Parse the structure manually (user's responsibility, just like py3dmol)
-    lines = xyz_data.strip().split('\n')
+    lines = xyz_data.strip().splitlines()
     natoms = int(lines[0])
     atom_lines = lines[2:2 + natoms]
 
@@ -35,24 +41,24 @@ def visualize_xyz_with_labels(xyz_path, title='Molecule'):
     # Set background (equivalent to view.setBackgroundColor())
     view.setBackgroundColor('black')
 
-    # User manually adds labels - exact same loop as py3dmol example
-    for idx, line in enumerate(atom_lines):
-        parts = line.split()
-        if len(parts) >= 4:
-            symbol = parts[0]
-            x, y, z = map(float, parts[1:4])
-            
-            # addLabel works exactly like py3dmol
-            view.addLabel(str(idx + 1), {
-                'position': {'x': x, 'y': y, 'z': z},
-                'backgroundColor': 'white',
-                'backgroundOpacity': 0,
-                'fontColor': 'blue',
-                'font': 'arial',
-                'fontSize': 16,
-                'fontOpacity': 1.0,
-                'inFront': True
-            })
+    # Parse every coordinate in one call rather than splitting line by line
+    coords = np.loadtxt(atom_lines, usecols=(1, 2, 3), ndmin=2)
+
+    # User builds the labels like the py3dmol loop, then adds them in one update
+    view.addLabels([
+        # Same text and options addLabel takes
+        {'text': str(idx + 1), 'options': {
+            'position': {'x': x, 'y': y, 'z': z},
+            'backgroundColor': 'white',
+            'backgroundOpacity': 0,
+            'fontColor': 'blue',
+            'font': 'arial',
+            'fontSize': 16,
+            'fontOpacity': 1.0,
+            'inFront': True
+        }}
+        for idx, (x, y, z) in enumerate(coords.tolist())
+    ])
 
     # Center/zoom (equivalent to view.zoomTo())
     view.center()
@@ -60,7 +66,7 @@ def visualize_xyz_with_labels(xyz_path, title='Molecule'):
     print(title)
     return view
 
-# Create sample XYZ files for testing
+# Sample XYZ data for testing
 reactant_xyz = """6
 Benzene (Reactant)
 C    0.0000    1.3970    0.0000
@@ -80,18 +86,11 @@ C   -1.2124   -0.7000    0.0000
 C   -1.2124    0.7000    0.0000
 H    0.0000    0.0000    1.0000"""
 
-# Write sample files
-with open('reactant.xyz', 'w') as f:
-    f.write(reactant_xyz)
-    
-with open('product.xyz', 'w') as f:
-    f.write(product_xyz)
-
 # Execute the function exactly like the py3dmol example
 print("Creating viewers with user-controlled labeling...")
 
-reactant_viewer = visualize_xyz_with_labels('reactant.xyz', 'Reactant')
-product_viewer = visualize_xyz_with_labels('product.xyz', 'Product')
+reactant_viewer = visualize_xyz_with_labels(reactant_xyz, 'Reactant')
+product_viewer = visualize_xyz_with_labels(product_xyz, 'Product')
 
 print(f"✅ Reactant viewer created with {len(reactant_viewer.labels)} labels")
 print(f"✅ Product viewer created with {len(product_viewer.labels)} labels")
@@ -99,9 +98,8 @@ print(f"✅ Product viewer created with {len(product_viewer.labels)} labels")
 # Alternative: User can also control labeling step by step
 print("\nAlternative approach - step by step control:")
 
-# Method 1: User reads file and controls everything
-with open('reactant.xyz') as f:
-    xyz_data = f.read()
+# Method 1: User provides the data and controls everything
+xyz_data = reactant_xyz
 
 viewer = Mol3DViewer()
 viewer.addModel(xyz_data, 'xyz')
@@ -109,20 +107,21 @@ viewer.setStyle({}, {'sphere': {'scale': 0.12}, 'stick': {'radius': 0.08}})
 viewer.setBackgroundColor('black')
 
 # User parses and adds labels manually
-lines = xyz_data.strip().split('\n')
+lines = xyz_data.strip().splitlines()
 natoms = int(lines[0])
 atom_lines = lines[2:2 + natoms]
 
-for idx, line in enumerate(atom_lines):
-    parts = line.split()
-    if len(parts) >= 4:
-        x, y, z = map(float, parts[1:4])
-        viewer.addLabel(str(idx + 1), {
-            'position': {'x': x, 'y': y, 'z': z},
-            'fontColor': 'red',  # User can customize
-            'fontSize': 14,
-            'inFront': True
-        })
+coords = np.loadtxt(atom_lines, usecols=(1, 2, 3), ndmin=2)
+
+viewer.addLabels([
+    {'text': str(idx + 1), 'options': {
+        'position': {'x': x, 'y': y, 'z': z},
+        'fontColor': 'red',  # User can customize
+        'fontSize': 14,
+        'inFront': True
+    }}
+    for idx, (x, y, z) in enumerate(coords.tolist())
+])
 
 print(f"✅ Manual step-by-step viewer created with {len(viewer.labels)} labels")
 
@@ -10,9 +10,18 @@ __author__ = "Panel-Chem Contributors"
 __email__ = "info@panel-chem.org"
 __description__ = "3D Molecular Visualization Extension for Panel"
 
-import panel as pn
 
-from .viewer import Mol3DViewer, view
+def __getattr__(name):
+    """Import the viewer (and with it Panel) lazily on first access (PEP 562)."""
+    if name in ('Mol3DViewer', 'view'):
+        from . import viewer
+        value = globals()[name] = getattr(viewer, name)
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | {'Mol3DViewer', 'view'})
 
 
 def _jupyter_labextension_paths():
@@ -56,6 +65,8 @@ def extension(*, template="material", theme="dark", **kwargs):
     >>> panel_3dmol.extension()
     """
     
+    import panel as pn
+    
     # Simply call Panel extension to ensure it's loaded
     try:
         pn.extension(template=template, **kwargs)
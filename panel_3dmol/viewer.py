@@ -1,7 +1,29 @@
+import gzip
+from contextlib import contextmanager
+
+import numpy as np
 import panel as pn
 import param
 from panel.reactive import ReactiveHTML
 
+# Pinned, minified 3Dmol.js build (cacheable, unlike the unversioned 3dmol.org build)
+THREEDMOL_JS_URL = "https://cdn.jsdelivr.net/npm/3dmol@2.4.0/build/3Dmol-min.js"
+
+
+def _compact_scripts(scripts):
+    """Strip indentation, blank lines and whole-line ``//`` comments from JS scripts.
+
+    Every viewer instance ships its own copy of the scripts to the browser, so the
+    readable source is kept here and roughly halved on the wire. Line breaks are
+    kept, so automatic semicolon insertion is unaffected.
+    """
+    compacted = {}
+    for name, code in scripts.items():
+        lines = (line.strip() for line in code.splitlines())
+        compacted[name] = "\n".join(line for line in lines if line and not line.startswith("//"))
+    return compacted
+
+
 class Mol3DViewer(ReactiveHTML):
     """
     A Panel component for 3D molecular visualization using 3Dmol.js.
@@ -12,6 +34,11 @@ class Mol3DViewer(ReactiveHTML):
     filetype = param.String(default="xyz", doc="File type (xyz, mol, pdb, sdf, etc.)")
     background_color = param.String(default="white", doc="Background color")
     
+    # Style sent to 3Dmol.js setStyle; the show_* flags below are Python-side
+    # toggles that rewrite it, so a style change is one synced value
+    style_spec = param.Dict(default={'stick': {'radius': 0.15}, 'sphere': {'radius': 0.3}},
+                            doc="3Dmol.js style object applied to all atoms")
+    
     # Style parameters for py3dmol compatibility
     show_stick = param.Boolean(default=True, doc="Show stick representation")
     show_sphere = param.Boolean(default=True, doc="Show sphere representation")  
@@ -29,7 +56,79 @@ class Mol3DViewer(ReactiveHTML):
     animate = param.Boolean(default=False, doc="Enable/disable animation")
     animation_speed = param.Number(default=100, bounds=(1, 10000), doc="Animation speed in milliseconds")
     animate_options = param.Dict(default={}, doc="Custom 3Dmol.js animation options")
+    frame_sync_interval = param.Integer(default=100, bounds=(0, None),
+                                        doc="While animating, report current_frame to Python at most every N ms (0: only when stopped)")
+    
+    # Diagnostics
+    debug = param.Boolean(default=False, doc="Log viewer activity to the browser console")
+    
+    # Structure text is not synced as a JSON string; it is sent as this binary
+    # payload instead, gzip-compressed once it reaches _gzip_threshold bytes
+    _structure = param.Bytes(default=b"", doc="Encoded structure payload sent to the browser")
+    
+    # Fire-and-forget actions for render()/center(); no structure resend
+    _render_tick = param.Event(doc="Redraw the viewer")
+    _center_tick = param.Event(doc="Zoom to the loaded model and redraw")
+    
+    # Trajectory payload set by addTrajectory: a raw float32 (n_frames, natoms, 3)
+    # buffer, sent as binary like _structure, plus one symbol list shared by every frame
+    _trajectory = param.Bytes(default=b"", doc="Little-endian float32 trajectory coordinates")
+    _trajectory_symbols = param.List(default=[], doc="Element symbols shared by all trajectory frames")
+    _trajectory_scale = param.List(default=[], doc="""
+        [offset x, y, z, step x, y, z] when _trajectory holds int16 steps, else empty""")
+    
+    # Lazily loaded frames (see addFrames): the browser asks for frames by setting
+    # _frame_request to [request id, index, ...]; the reply is uint32 [request id,
+    # count, (index, byte length) * count] followed by the encoded frame texts
+    _lazy_frames = param.Boolean(default=False, doc="Frames are sent on request")
+    _frame_request = param.List(default=[], doc="[request id, frame index, ...] asked for by the browser")
+    _frame_payload = param.Bytes(default=b"", doc="Encoded frames sent in reply to _frame_request")
+    
+    # Atom coordinates for show_atom_labels, parsed once in Python and sent as
+    # float32 (natoms, 3) bytes so the browser never re-parses the structure text
+    _atom_coords = param.Bytes(default=b"", doc="Float32 atom coordinates for the index labels")
+    
+    
+    _rename = {
+        'structure': None,
+        'show_stick': None,
+        'show_sphere': None,
+        'show_cartoon': None,
+        'show_line': None,
+        'show_surface': None,
+    }
+    
+    # Default options for each representation toggled through a show_* flag
+    _default_styles = {
+        'stick': {'radius': 0.15},
+        'sphere': {'radius': 0.3},
+        'cartoon': {},
+        'line': {},
+        'surface': {},
+    }
+    
+    # Style used when nothing is enabled; built once, 3Dmol.js never mutates it
+    _fallback_style = {'stick': _default_styles['stick'], 'sphere': _default_styles['sphere']}
+    
+    # Options for the atom index labels added by autoLabel
+    _atom_label_style = {
+        'backgroundColor': 'white',
+        'backgroundOpacity': 0,
+        'fontColor': 'blue',
+        'font': 'arial',
+        'fontSize': 16,
+        'fontOpacity': 1.0,
+        'inFront': True,
+    }
     
+    # Structures at least this large (in UTF-8 bytes) are gzip-compressed
+    _gzip_threshold = 4096
+    
+    # addFrames sends XYZ frames lazily once they total this many characters
+    _lazy_frames_threshold = 4 * 1024 * 1024
+    
+    # Fixed-width layout of the first 54 columns of a PDB ATOM/HETATM record
+    _pdb_atom_record = np.dtype([('record', 'S30'), ('xyz', 'S8', (3,))])
     
     # HTML template (simplified - no multiple template variables)
     _template = """
@@ -40,644 +139,1024 @@ class Mol3DViewer(ReactiveHTML):
     """
     
     # JavaScript for 3Dmol.js integration (correct Panel ReactiveHTML syntax)
-    _scripts = {
+    _scripts = _compact_scripts({
         "render": """
             const viewerDiv = viewer;
             
-            // Check if 3Dmol.js is loaded
-            if (typeof $3Dmol === 'undefined') {
-                console.error('🧬 RENDER: 3Dmol.js is not loaded yet, retrying in 100ms...');
-                setTimeout(() => {
+            // Progress logging is off unless debug is set: console.log is synchronous
+            // and serializes its arguments, which shows on every load with DevTools open
+            state.log = function (...args) {
+                if (data.debug) {
+                    console.log(...args);
+                }
+            };
+            
+            // Load 3Dmol.js at most once per page: every viewer shares one promise that
+            // resolves as soon as the library is available (normally already loaded
+            // via __javascript__, otherwise injected here) instead of polling for it
+            if (!window.__3DmolReady) {
+                window.__3DmolReady = new Promise((resolve, reject) => {
                     if (typeof $3Dmol !== 'undefined') {
-                        console.log('🧬 RENDER: 3Dmol.js loaded on retry');
-                        // Retry the render
-                        state.viewer = $3Dmol.createViewer(viewerDiv, {backgroundColor: data.background_color || "white"});
-                        // ... rest of render logic would go here
-                    } else {
-                        console.error('🧬 RENDER: 3Dmol.js still not loaded after retry');
+                        resolve();
+                        return;
                     }
-                }, 100);
-                return;
+                    const script = document.createElement('script');
+                    script.src = '""" + THREEDMOL_JS_URL + """';
+                    script.onload = resolve;
+                    script.onerror = reject;
+                    document.head.appendChild(script);
+                });
             }
             
-            state.viewer = $3Dmol.createViewer(viewerDiv, {backgroundColor: data.background_color || "white"});
-            console.log('🧬 RENDER: 3Dmol viewer created:', !!state.viewer);
+            // Frame counter text; needs no viewer, so it is set up before 3Dmol.js loads.
+            // Panel binds the template's current-frame/total-frames spans to the
+            // current_frame/total_frames variables (their ids are per instance, so
+            // document.getElementById cannot find them); keep the references and only
+            // touch the DOM when the shown value changes
+            state.currentFrameSpan = current_frame;
+            state.totalFramesSpan = total_frames;
+            state.counterFrame = null;
+            state.counterTotal = null;
+            state.updateFrameCounter = function (frame = data.current_frame) {
+                if (state.counterFrame !== frame) {
+                    state.counterFrame = frame;
+                    state.currentFrameSpan.textContent = frame;
+                }
+                if (state.counterTotal !== data.total_frames) {
+                    state.counterTotal = data.total_frames;
+                    state.totalFramesSpan.textContent = data.total_frames;
+                }
+            };
+            state.updateFrameCounter();
             
-            if (data.structure) {
-                console.log('🧬 RENDER: Loading structure with', data.total_frames, 'frames');
-                console.log('🧬 RENDER: Structure length:', data.structure.length, 'characters');
-                
-                // Check if this is multi-frame data
-                if (data.total_frames > 1) {
-                    console.log('🧬 RENDER: Using addModelsAsFrames for multi-frame structure');
-                    try {
-                        // Use addModelsAsFrames for multi-frame structures
-                        state.viewer.addModelsAsFrames(data.structure, data.filetype);
-                        console.log('🧬 RENDER: addModelsAsFrames completed successfully');
-                    } catch (err) {
-                        console.error('🧬 RENDER: Error in addModelsAsFrames:', err);
-                        console.log('🧬 RENDER: Falling back to single model...');
-                        state.viewer.addModel(data.structure, data.filetype);
-                    }
-                } else {
-                    console.log('🧬 RENDER: Using addModel for single frame');
-                    // Single frame - use regular addModel
-                    state.viewer.addModel(data.structure, data.filetype);
+            // Defer the WebGL context and model parse until the viewer is on screen, so
+            // viewers in closed tabs/accordions cost nothing (browsers cap live contexts).
+            // Handlers below all check state.viewer, and creation reads the latest data.
+            // The observer stays attached afterwards to pause the viewer off screen.
+            if (state.visibilityObserver) {
+                state.visibilityObserver.disconnect();
+            }
+            state.onScreen = typeof IntersectionObserver === 'undefined';
+            const visible = new Promise(resolve => {
+                if (state.onScreen) {
+                    resolve();
+                    return;
                 }
-                state.viewer.setStyle({}, {stick:{radius: 0.15}, sphere:{radius: 0.3}});
-                state.viewer.zoomTo();
-                state.viewer.render();
-                
-                // Debug: Check loaded models
-                try {
-                    if (typeof state.viewer.getModels === 'function') {
-                        const models = state.viewer.getModels();
-                        console.log('🧬 RENDER: Models loaded after render:', models.length);
-                        if (models.length > 0 && data.total_frames > 1) {
-                            console.log('🧬 RENDER: Model has frames:', models[0].getFrames ? models[0].getFrames() : 'No getFrames method');
-                            // Try to get frame count if available
-                            try {
-                                if (typeof models[0].getFrames === 'function') {
-                                    const frameCount = models[0].getFrames();
-                                    console.log('🧬 RENDER: Actual frame count from model:', frameCount);
-                                }
-                            } catch (e) {
-                                console.log('🧬 RENDER: Cannot get frame count:', e.message);
-                            }
-                        }
+                state.visibilityObserver = new IntersectionObserver(entries => {
+                    state.onScreen = entries[entries.length - 1].isIntersecting;
+                    if (state.onScreen) {
+                        resolve();
+                    }
+                    if (state.updateVisibility) {
+                        state.updateVisibility();
+                    }
+                });
+                state.visibilityObserver.observe(viewerDiv);
+            });
+
+            Promise.all([window.__3DmolReady, visible]).then(() => {
+                state.loaded = null;  // A new viewer holds no model yet
+                state.viewer = $3Dmol.createViewer(viewerDiv, {backgroundColor: data.background_color || "white"});
+                state.log('🧬 RENDER: 3Dmol viewer created:', !!state.viewer);
+            
+                // Skip drawing while the tab is hidden or the viewer is scrolled off
+                // screen; the last skipped frame is drawn once it is visible again
+                state.isVisible = function () {
+                    return document.visibilityState === 'visible' && state.onScreen;
+                };
+                state.render = function () {
+                    if (state.drawDeferred) {
+                        state.drawPending = true;  // Drawn once after the queued tasks run
+                        return;
+                    }
+                    if (state.isVisible()) {
+                        state.renderStale = false;
+                        state.viewer.render();
                     } else {
-                        console.log('🧬 RENDER: getModels method not available on viewer');
+                        state.renderStale = true;
+                    }
+                };
+                state.updateVisibility = function () {
+                    if (!state.isVisible()) {
+                        state.pausePlayback();
+                        return;
+                    }
+                    if (state.renderStale) {
+                        state.render();
                     }
-                } catch (e) {
-                    console.error('🧬 RENDER: Error checking models:', e.message);
+                    state.resumePlayback();
+                };
+                if (state.visibilityListener) {
+                    document.removeEventListener('visibilitychange', state.visibilityListener);
                 }
-            }
-        """,
-        
-        "structure": """
-            if (state.viewer) {
-                state.viewer.clear();
-                if (data.structure) {
-                    console.log('🧬 Updating structure with', data.total_frames, 'frames');
-                    console.log('🧬 Structure length:', data.structure.length, 'characters');
-                    
-                    // Check if this is multi-frame data
-                    if (data.total_frames > 1) {
-                        console.log('🧬 Using addModelsAsFrames for multi-frame structure update');
+                state.visibilityListener = () => state.updateVisibility();
+                document.addEventListener('visibilitychange', state.visibilityListener);
+            
+                // Single style step shared by the style_spec handler and structure loaders
+                state.applyStyle = function (render = true) {
+                    // style_spec is built in Python (setStyle / show_* flags)
+                    state.viewer.setStyle({}, data.style_spec);
+                    if (render) {
+                        state.render();
+                    }
+                };
+            
+                // View a Bytes payload (ArrayBuffer or typed array) as a Uint8Array
+                state.payloadBytes = function (payload) {
+                    if (!payload) {
+                        return new Uint8Array(0);
+                    }
+                    return ArrayBuffer.isView(payload)
+                        ? new Uint8Array(payload.buffer, payload.byteOffset, payload.byteLength)
+                        : new Uint8Array(payload);
+                };
+            
+                // Decode text encoded by _encode_text and call done(text); plain UTF-8
+                // decodes synchronously, gzip via DecompressionStream
+                state.decodeText = function (bytes, done) {
+                    if (bytes.length > 1 && bytes[0] === 0x1f && bytes[1] === 0x8b) {
+                        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+                        new Response(stream).text().then(done);
+                    } else {
+                        done(new TextDecoder().decode(bytes));
+                    }
+                };
+            
+                // Decode the binary structure payload into state.structureText, then call done();
+                // callers arriving while that payload is still decompressing wait for it
+                state.decodeStructure = function (done) {
+                    const payload = data._structure;
+                    if (payload === state.structurePayload) {
+                        done();
+                        return;
+                    }
+                    if (state.decoding && state.decoding.payload === payload) {
+                        state.decoding.waiting.push(done);
+                        return;
+                    }
+                    const decoding = state.decoding = {payload, waiting: [done]};
+                    state.decodeText(state.payloadBytes(payload), (text) => {
+                        if (state.decoding === decoding) {
+                            state.decoding = null;
+                        }
+                        if (data._structure !== payload) {
+                            return;  // A newer payload arrived while decompressing
+                        }
+                        state.structurePayload = payload;
+                        state.structureText = text;
+                        decoding.waiting.forEach((fn) => fn());
+                    });
+                };
+            
+                // Parse a structure with 3Dmol.js' own parsers in a Web Worker shared by
+                // all viewers on the page; done(atoms) runs with the parsed atoms, or
+                // done(null) if parsing failed. Returns false when no worker is available.
+                const PARSE_IN_WORKER_LENGTH = 1000000;
+                state.parseInWorker = function (text, format, done) {
+                    let worker = window.__3DmolParseWorker;
+                    if (worker === undefined) {
+                        worker = null;
                         try {
-                            // Use addModelsAsFrames for multi-frame structures
-                            state.viewer.addModelsAsFrames(data.structure, data.filetype);
-                            console.log('🧬 addModelsAsFrames completed successfully');
+                            const workerMain = function () {
+                                addEventListener('message', (event) => {
+                                    const {id, buffer, format} = event.data;
+                                    try {
+                                        const text = new TextDecoder().decode(buffer);
+                                        const parse = $3Dmol.Parsers[format] || $3Dmol.Parsers[format.toLowerCase()];
+                                        const models = parse(text, {});
+                                        postMessage({id, atoms: Array.from(models[0] || [])});
+                                    } catch (err) {
+                                        postMessage({id, error: String(err)});
+                                    }
+                                });
+                            };
+                            const source = "importScripts('""" + THREEDMOL_JS_URL + """');(" + workerMain.toString() + ")();";
+                            worker = new Worker(URL.createObjectURL(new Blob([source], {type: 'text/javascript'})));
+                            worker.pending = new Map();
+                            worker.nextId = 0;
+                            worker.onmessage = (event) => {
+                                const callback = worker.pending.get(event.data.id);
+                                worker.pending.delete(event.data.id);
+                                if (callback) {
+                                    callback(event.data.error ? null : event.data.atoms);
+                                }
+                            };
+                            worker.onerror = () => {
+                                // e.g. 3Dmol.js failed to load in the worker: parse on the main thread
+                                console.error('🧬 Parse worker failed, parsing on the main thread');
+                                window.__3DmolParseWorker = null;
+                                worker.terminate();
+                                worker.pending.forEach(callback => callback(null));
+                                worker.pending.clear();
+                            };
                         } catch (err) {
-                            console.error('🧬 Error in addModelsAsFrames:', err);
-                            console.log('🧬 Falling back to single model...');
-                            state.viewer.addModel(data.structure, data.filetype);
+                            worker = null;
                         }
+                        window.__3DmolParseWorker = worker;
+                    }
+                    if (!worker) {
+                        return false;
+                    }
+                    const id = worker.nextId++;
+                    // Hand the text over as a transferred buffer instead of a cloned string
+                    const buffer = new TextEncoder().encode(text).buffer;
+                    worker.pending.set(id, done);
+                    worker.postMessage({id, buffer, format}, [buffer]);
+                    return true;
+                };
+            
+                // Full model (re)load; only structure/filetype changes go through here,
+                // style toggles just call applyStyle
+                state.loadStructure = function () {
+                    // A load can be queued while the text is unchanged, e.g. a filetype
+                    // update that ends at the same value, a structure cleared and set back
+                    // within one frame, or a new payload (raw vs gzip) decoding to the same
+                    // text; the model is already loaded, so only restyle and re-zoom. JS
+                    // strings are immutable, so keeping a reference costs no copy.
+                    const loaded = state.loaded;
+                    if (loaded && state.structureText && loaded.structure === state.structureText &&
+                        loaded.filetype === data.filetype && loaded.total_frames === data.total_frames &&
+                        loaded.lazy_frames === data._lazy_frames) {
+                        state.applyStyle(false);
+                        state.viewer.zoomTo();
+                        state.render();
+                        return;
+                    }
+                    state.loaded = {structure: state.structureText, filetype: data.filetype, total_frames: data.total_frames,
+                                    lazy_frames: data._lazy_frames};
+                
+                    state.viewer.clear();
+                    if (!state.structureText) {
+                        state.render();
                     } else {
-                        console.log('🧬 Using addModel for single frame update');
-                        // Single frame - use regular addModel
-                        state.viewer.addModel(data.structure, data.filetype);
-                    }
-                    
-                    // Build style based on current parameters
-                    const style = {};
-                    if (data.show_stick) style.stick = {radius: 0.15};
-                    if (data.show_sphere) style.sphere = {radius: 0.3};
-                    if (data.show_cartoon) style.cartoon = {};
-                    if (data.show_line) style.line = {};
-                    if (data.show_surface) style.surface = {};
-                    
-                    // Default to stick+sphere if nothing selected
-                    if (Object.keys(style).length === 0) {
-                        style.stick = {radius: 0.15};
-                        style.sphere = {radius: 0.3};
-                    }
-                    
-                    state.viewer.setStyle({}, style);
-                    state.viewer.zoomTo();
-                    
-                    // Debug: Check loaded models after structure update
-                    try {
-                        if (typeof state.viewer.getModels === 'function') {
-                            const models = state.viewer.getModels();
-                            console.log('🧬 Models loaded after structure update:', models.length);
-                            if (models.length > 0 && data.total_frames > 1) {
-                                console.log('🧬 Model frames after update:', models[0].getFrames ? models[0].getFrames() : 'No getFrames method');
-                                // Try to get frame count if available
-                                try {
-                                    if (typeof models[0].getFrames === 'function') {
-                                        const frameCount = models[0].getFrames();
-                                        console.log('🧬 Actual frame count from model:', frameCount);
+                        state.log('🧬 Updating structure with', data.total_frames, 'frames');
+                        state.log('🧬 Structure length:', state.structureText.length, 'characters');
+                
+                        if (data._lazy_frames) {
+                            // Frames are fetched on request; the structure is frame 0
+                            state.frameCache.clear();
+                            state.frameCache.set(0, state.structureText);
+                            state.frameRequests.clear();
+                            state.frameSeqFloor = state.frameRequestSeq;
+                            state.shownFrame = 0;
+                        }
+                
+                        // Check if this is multi-frame data
+                        if (data.total_frames > 1 && !data._lazy_frames) {
+                            state.log('🧬 Using addModelsAsFrames for multi-frame structure update');
+                            try {
+                                // Use addModelsAsFrames for multi-frame structures
+                                state.viewer.addModelsAsFrames(state.structureText, data.filetype);
+                                state.log('🧬 addModelsAsFrames completed successfully');
+                            } catch (err) {
+                                console.error('🧬 Error in addModelsAsFrames:', err);
+                                state.log('🧬 Falling back to single model...');
+                                state.viewer.addModel(state.structureText, data.filetype);
+                            }
+                        } else {
+                            // Large single models are parsed in a worker so the page stays
+                            // responsive; the rest of the load runs when the atoms arrive
+                            const text = state.structureText;
+                            const format = data.filetype;
+                            if (text.length >= PARSE_IN_WORKER_LENGTH && state.parseInWorker(text, format, (atoms) => {
+                                if (state.structureText !== text || data.filetype !== format) {
+                                    return;  // Superseded by a newer load
+                                }
+                                let added = false;
+                                if (atoms) {
+                                    try {
+                                        state.viewer.addModel().addAtoms(atoms);
+                                        added = true;
+                                    } catch (err) {
+                                        console.error('🧬 Could not add worker-parsed atoms:', err);
+                                        state.viewer.clear();
                                     }
-                                } catch (e) {
-                                    console.log('🧬 Cannot get frame count:', e.message);
                                 }
+                                if (!added) {
+                                    state.viewer.addModel(text, format);
+                                }
+                                state.finishLoad();
+                            })) {
+                                return;
                             }
-                        } else {
-                            console.log('🧬 getModels method not available on viewer');
+                            state.log('🧬 Using addModel for single frame update');
+                            // Single frame - use regular addModel
+                            state.viewer.addModel(state.structureText, data.filetype);
                         }
-                    } catch (e) {
-                        console.error('🧬 Error checking models:', e.message);
+                        state.finishLoad();
                     }
-                    
-                    // Handle labels after structure is loaded
+                };
+            
+                // Flat [x0, y0, z0, x1, ...] atom coordinates for the index labels,
+                // parsed in Python and sent as float32 bytes; wrapped once per payload
+                state.atomCoordinates = function () {
+                    const payload = data._atom_coords;
+                    if (payload !== state.atomCoordsPayload) {
+                        let buffer = new ArrayBuffer(0);
+                        if (payload) {
+                            // Float32Array needs a 4-byte aligned offset, so copy views out
+                            buffer = ArrayBuffer.isView(payload)
+                                ? payload.buffer.slice(payload.byteOffset, payload.byteOffset + payload.byteLength)
+                                : payload;
+                        }
+                        state.atomCoords = new Float32Array(buffer);
+                        state.atomCoordsPayload = payload;
+                    }
+                    return state.atomCoords;
+                };
+            
+                // Labels are added with addLabel's noshow flag so a batch of thousands
+                // does not redraw per label; callers draw once afterwards
+                state.addCustomLabels = function () {
+                    if (data.labels && Array.isArray(data.labels)) {
+                        data.labels.forEach(label => {
+                            state.viewer.addLabel(label.text, label.options || {}, null, true);
+                        });
+                    }
+                };
+            
+                // Re-add atom number labels (if enabled) and custom labels; shared by
+                // structure loads and the show_atom_labels toggle
+                state.rebuildLabels = function () {
                     state.viewer.removeAllLabels();
-                    
+                
                     // Add atom labels if enabled
                     if (data.show_atom_labels) {
-                        const lines = data.structure.trim().split('\\n');
-                        if (data.filetype === 'xyz' && lines.length > 2) {
-                            const natoms = parseInt(lines[0]);
-                            const atomLines = lines.slice(2, 2 + natoms);
-                            
-                            atomLines.forEach((line, idx) => {
-                                const parts = line.trim().split(/\\s+/);
-                                if (parts.length >= 4) {
-                                    const x = parseFloat(parts[1]);
-                                    const y = parseFloat(parts[2]);
-                                    const z = parseFloat(parts[3]);
-                                    
-                                    state.viewer.addLabel(String(idx + 1), {
-                                        position: {x: x, y: y, z: z},
-                                        backgroundColor: 'white',
-                                        backgroundOpacity: 0,
-                                        fontColor: 'blue',
-                                        font: 'arial',
-                                        fontSize: 16,
-                                        fontOpacity: 1.0,
-                                        inFront: true
-                                    });
-                                }
-                            });
-                        } else if (data.filetype === 'pdb') {
-                            const atomLines = lines.filter(line => line.startsWith('ATOM') || line.startsWith('HETATM'));
-                            
-                            atomLines.forEach((line, idx) => {
-                                const x = parseFloat(line.substring(30, 38).trim());
-                                const y = parseFloat(line.substring(38, 46).trim());
-                                const z = parseFloat(line.substring(46, 54).trim());
-                                
-                                state.viewer.addLabel(String(idx + 1), {
-                                    position: {x: x, y: y, z: z},
-                                    backgroundColor: 'white',
-                                    backgroundOpacity: 0,
-                                    fontColor: 'blue',
-                                    font: 'arial',
-                                    fontSize: 16,
-                                    fontOpacity: 1.0,
-                                    inFront: true
-                                });
-                            });
+                        const coords = state.atomCoordinates();
+                        for (let i = 0; i < coords.length; i += 3) {
+                            state.viewer.addLabel(String(i / 3 + 1), {
+                                position: {x: coords[i], y: coords[i + 1], z: coords[i + 2]},
+                                backgroundColor: 'white',
+                                backgroundOpacity: 0,
+                                fontColor: 'blue',
+                                font: 'arial',
+                                fontSize: 16,
+                                fontOpacity: 1.0,
+                                inFront: true
+                            }, null, true);
                         }
                     }
-                    
+                
                     // Add custom labels
-                    if (data.labels && Array.isArray(data.labels)) {
-                        data.labels.forEach(label => {
-                            state.viewer.addLabel(label.text, label.options || {});
-                        });
+                    state.addCustomLabels();
+                };
+            
+                // Build frames from the coordinate buffer sent by addTrajectory
+                state.loadTrajectory = function () {
+                    // View the buffer sent by addTrajectory; a typed-array view is copied
+                    // out since Float32Array/Int16Array need an aligned offset
+                    const payload = data._trajectory;
+                    const buffer = ArrayBuffer.isView(payload)
+                        ? payload.buffer.slice(payload.byteOffset, payload.byteOffset + payload.byteLength)
+                        : payload;
+                    const scale = data._trajectory_scale;
+                    let coords;
+                    if (scale && scale.length === 6) {
+                        // int16 steps: coordinate = offset[axis] + q * step[axis]
+                        const quantized = new Int16Array(buffer);
+                        coords = new Float32Array(quantized.length);
+                        for (let i = 0; i < quantized.length; i++) {
+                            const axis = i % 3;
+                            coords[i] = scale[axis] + quantized[i] * scale[3 + axis];
+                        }
+                    } else {
+                        coords = new Float32Array(buffer);
                     }
-                    
-                    state.viewer.render();
-                }
-            }
-        """,
-        
-        "filetype": """
-            if (state.viewer && data.structure) {
-                state.viewer.clear();
-                state.viewer.addModel(data.structure, data.filetype);
+                    const symbols = data._trajectory_symbols;
+                    const natoms = symbols.length;
+                    const nframes = natoms ? coords.length / (natoms * 3) : 0;
                 
-                // Apply current style
-                const style = {};
-                if (data.show_stick) style.stick = {radius: 0.15};
-                if (data.show_sphere) style.sphere = {radius: 0.3};
-                if (data.show_cartoon) style.cartoon = {};
-                if (data.show_line) style.line = {};
-                if (data.show_surface) style.surface = {};
+                    // Synthesize multi-frame XYZ text for addModelsAsFrames
+                    const lines = [];
+                    for (let f = 0; f < nframes; f++) {
+                        lines.push(String(natoms), 'Frame ' + (f + 1));
+                        for (let a = 0; a < natoms; a++) {
+                            const o = (f * natoms + a) * 3;
+                            lines.push(symbols[a] + ' ' + coords[o].toFixed(4) + ' ' +
+                                       coords[o + 1].toFixed(4) + ' ' + coords[o + 2].toFixed(4));
+                        }
+                    }
                 
-                if (Object.keys(style).length === 0) {
-                    style.stick = {radius: 0.15};
-                    style.sphere = {radius: 0.3};
-                }
+                    state.loaded = null;
+                    state.viewer.clear();
+                    state.viewer.addModelsAsFrames(lines.join('\\n'), 'xyz');
+                
+                    // Apply current style
+                    state.applyStyle(false);
+                    state.viewer.zoomTo();
+                    state.render();
+                };
+            
+                // Style, zoom, labels and draw for a freshly added model
+                state.finishLoad = function () {
+                    // Apply current style
+                    state.applyStyle(false);
+                    state.viewer.zoomTo();
+                
+                    // Debug: Check loaded models after structure update
+                    if (data.debug) {
+                        try {
+                            if (typeof state.viewer.getModels === 'function') {
+                                const models = state.viewer.getModels();
+                                state.log('🧬 Models loaded after structure update:', models.length);
+                                if (models.length > 0 && data.total_frames > 1) {
+                                    state.log('🧬 Model frames after update:', models[0].getFrames ? models[0].getFrames() : 'No getFrames method');
+                                    // Try to get frame count if available
+                                    try {
+                                        if (typeof models[0].getFrames === 'function') {
+                                            const frameCount = models[0].getFrames();
+                                            state.log('🧬 Actual frame count from model:', frameCount);
+                                        }
+                                    } catch (e) {
+                                        state.log('🧬 Cannot get frame count:', e.message);
+                                    }
+                                }
+                            } else {
+                                state.log('🧬 getModels method not available on viewer');
+                            }
+                        } catch (e) {
+                            console.error('🧬 Error checking models:', e.message);
+                        }
+                    }
                 
-                state.viewer.setStyle({}, style);
-                state.viewer.zoomTo();
-                state.viewer.render();
+                    // Handle labels after structure is loaded
+                    state.rebuildLabels();
+                
+                    state.render();
+                };
+            
+                // Run queued viewer updates at most once per animation frame; a task queued
+                // again under the same key before the frame fires replaces the earlier one,
+                // and the draws the tasks ask for are merged into a single render
+                state.pendingRenders = new Map();
+                state.scheduleRender = function (key, fn) {
+                    state.pendingRenders.set(key, fn);
+                    if (state.renderRequested) {
+                        return;
+                    }
+                    state.renderRequested = true;
+                    requestAnimationFrame(() => {
+                        state.renderRequested = false;
+                        const tasks = Array.from(state.pendingRenders.values());
+                        state.pendingRenders.clear();
+                        state.drawDeferred = true;
+                        try {
+                            tasks.forEach(task => task());
+                        } finally {
+                            state.drawDeferred = false;
+                        }
+                        if (state.drawPending) {
+                            state.drawPending = false;
+                            state.render();
+                        }
+                    });
+                };
+            
+                // Lazily loaded frames: Python keeps the frame texts and sends the ones each
+                // request asks for; the decoded texts around current_frame stay in a small LRU cache
+                const FRAME_CACHE_SIZE = 64;
+                const FRAME_PREFETCH = 3;
+                state.frameCache = new Map();
+                state.frameRequests = new Map();  // Frame index -> id of the request asking for it
+                state.frameRequestSeq = 0;
+                state.frameSeqFloor = 0;
+                // Ask for every missing frame in one message: Panel only forwards the latest
+                // _frame_request of a burst, so separate requests would be lost
+                state.requestFrames = function (indices) {
+                    const wanted = [...new Set(indices)].filter((n) => n >= 0 && n < data.total_frames &&
+                        !state.frameCache.has(n) && !state.frameRequests.has(n));
+                    if (!wanted.length) {
+                        return;
+                    }
+                    state.frameRequestSeq += 1;
+                    for (const n of wanted) {
+                        state.frameRequests.set(n, state.frameRequestSeq);
+                    }
+                    data._frame_request = [state.frameRequestSeq, ...wanted];
+                };
+                // Frame n and the next FRAME_PREFETCH frames
+                state.requestAround = function (n) {
+                    const indices = [n];
+                    for (let i = 1; i <= FRAME_PREFETCH; i++) {
+                        indices.push((n + i) % data.total_frames);
+                    }
+                    state.requestFrames(indices);
+                };
+                state.cacheFrame = function (n, text) {
+                    state.frameRequests.delete(n);
+                    state.frameCache.set(n, text);
+                    for (const key of state.frameCache.keys()) {
+                        if (state.frameCache.size <= FRAME_CACHE_SIZE) {
+                            break;
+                        }
+                        if (key !== state.wantedFrame) {
+                            state.frameCache.delete(key);
+                        }
+                    }
+                    if (n === state.wantedFrame) {
+                        state.scheduleRender('frame', () => state.showFrame(n));
+                    }
+                };
+                // The payload is uint32 [request id, count, (index, byte length) * count]
+                // followed by the encoded frame texts
+                state.receiveFrame = function (payload) {
+                    const bytes = state.payloadBytes(payload);
+                    if (bytes.length < 8) {
+                        return;
+                    }
+                    const header = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+                    const seq = header.getUint32(0, true);
+                    if (seq <= state.frameSeqFloor) {
+                        return;  // Requested before the current frames were loaded
+                    }
+                    const count = header.getUint32(4, true);
+                    const answered = new Set();
+                    let offset = 8 + 8 * count;
+                    for (let i = 0; i < count; i++) {
+                        const n = header.getUint32(8 + 8 * i, true);
+                        const length = header.getUint32(12 + 8 * i, true);
+                        answered.add(n);
+                        state.decodeText(bytes.subarray(offset, offset + length), (text) => state.cacheFrame(n, text));
+                        offset += length;
+                    }
+                    // Anything still pending from this or an earlier request was dropped on
+                    // the way, so forget it and ask again for the frame on screen
+                    for (const [n, id] of state.frameRequests) {
+                        if (id <= seq && !answered.has(n)) {
+                            state.frameRequests.delete(n);
+                        }
+                    }
+                    if (state.wantedFrame !== undefined && !state.frameCache.has(state.wantedFrame)) {
+                        state.requestAround(state.wantedFrame);
+                    }
+                };
+                state.showFrame = function (n) {
+                    state.wantedFrame = n;
+                    const text = state.frameCache.get(n);
+                    if (text === undefined) {
+                        state.requestAround(n);
+                        return;
+                    }
+                    state.frameCache.delete(n);  // Most recently used goes last
+                    state.frameCache.set(n, text);
+                    if (state.shownFrame !== n) {
+                        // Swap the model but keep the camera, labels and shapes
+                        state.viewer.removeAllModels();
+                        state.viewer.addModel(text, data.filetype);
+                        state.applyStyle(false);
+                        state.shownFrame = n;
+                    }
+                    state.render();
+                    state.requestAround(n);
+                };
+                // Show frame n from whichever frame storage is in use
+                state.gotoFrame = function (n) {
+                    if (data._lazy_frames) {
+                        state.showFrame(n);
+                    } else {
+                        Promise.resolve(state.viewer.setFrame(n)).then(() => state.render());
+                    }
+                };
+            
+                // Show data.current_frame after a change from Python
+                state.seekFrame = function () {
+                    if (data.current_frame === state.reportedFrame) {
+                        // Echo of a frame reported by playback, which is already on screen
+                        state.reportedFrame = null;
+                        return;
+                    }
+                    state.reportedFrame = null;
+                    state.playFrame = data.current_frame;  // Playback continues from a seek
+                
+                    // Frame updates can arrive faster than the display refreshes; only the
+                    // latest frame requested within one animation frame is drawn
+                    state.scheduleRender('frame', () => {
+                        try {
+                            state.gotoFrame(data.current_frame);
+                        } catch (err) {
+                            console.error('Frame update failed:', err);
+                        }
+                    });
+                };
+            
+                // Frame playback runs in the browser: a requestAnimationFrame loop steps
+                // through the frames in time with the display's repaints and
+                // current_frame is reported back to Python at most every frame_sync_interval
+                // ms, and when playback stops (only then if the interval is 0)
+                state.reportFrame = function () {
+                    state.lastFrameReport = performance.now();
+                    if (data.current_frame !== state.playFrame) {
+                        state.reportedFrame = state.playFrame;
+                        data.current_frame = state.playFrame;
+                    }
+                };
+                state.stopPlayback = function () {
+                    state.pausePlayback();
+                    if (state.animating) {
+                        state.animating = false;
+                        state.reportFrame();
+                    }
+                };
+                state.startPlayback = function () {
+                    state.pausePlayback();
+                    const options = Object.assign({
+                        loop: 'forward',
+                        interval: data.animation_speed || 200,
+                        reps: 0  // Infinite loop
+                    }, data.animate_options || {});
+                    state.playback = {
+                        options: options,
+                        bounce: options.loop === 'backAndForth' || options.loop === 'bounce',
+                        direction: (options.loop === 'backward' || options.loop === 'reverse') ? -1 : 1,
+                        reps: 0
+                    };
+                
+                    if (!state.animating) {
+                        state.playFrame = data.current_frame;
+                        state.lastFrameReport = performance.now();
+                    }
+                    state.animating = true;
+                    state.resumePlayback();
+                };
+                // The loop only runs while the viewer is visible: updateVisibility stops
+                // it when the tab is hidden or the viewer scrolls off screen and starts it
+                // again, from the same frame, once it is back
+                state.pausePlayback = function () {
+                    cancelAnimationFrame(state.playbackTimer);
+                    state.playbackTimer = null;
+                };
+                state.resumePlayback = function () {
+                    if (state.animating && !state.playbackTimer && state.isVisible()) {
+                        state.playbackLast = null;
+                        state.playbackTimer = requestAnimationFrame(state.tickPlayback);
+                    }
+                };
+                state.tickPlayback = function (timestamp) {
+                    state.playbackTimer = requestAnimationFrame(state.tickPlayback);
+                    const interval = state.playback.options.interval;
+                    if (state.playbackLast === null) {
+                        state.playbackLast = timestamp;  // First step comes one interval later
+                        return;
+                    }
+                    const elapsed = timestamp - state.playbackLast;
+                    if (elapsed < interval) {
+                        return;
+                    }
+                    // Advance on the interval grid so repaint jitter does not drift the
+                    // speed; after a stall, restart the grid rather than catching up
+                    state.playbackLast = elapsed < 2 * interval ? state.playbackLast + interval : timestamp;
+                    state.stepPlayback();
+                };
+                state.stepPlayback = function () {
+                    const playback = state.playback;
+                    const nframes = data.total_frames;
+                    let next = state.playFrame + playback.direction;
+                    if (next < 0 || next >= nframes) {
+                        if (playback.options.reps > 0 && ++playback.reps >= playback.options.reps) {
+                            state.stopPlayback();
+                            data.animate = false;
+                            return;
+                        }
+                        if (playback.bounce) {
+                            playback.direction = -playback.direction;
+                            next = state.playFrame + playback.direction;
+                        } else {
+                            next = playback.direction > 0 ? 0 : nframes - 1;
+                        }
+                    }
+                    state.playFrame = next;
+                    state.gotoFrame(next);
+                    // current_frame is only reported back occasionally, so keep the
+                    // counter in step with playback here
+                    state.updateFrameCounter(next);
+                    if (data.frame_sync_interval > 0 &&
+                        performance.now() - state.lastFrameReport >= data.frame_sync_interval) {
+                        state.reportFrame();
+                    }
+                };
+            
+                state.structureText = '';
+                state.decodeStructure(() => {
+                    if (state.structureText) {
+                        state.loadStructure();
+                    } else if (data._trajectory && data._trajectory.byteLength) {
+                        self._trajectory();
+                    }
+                });
+            }).catch(err => console.error('🧬 RENDER: Could not load 3Dmol.js:', err));
+        """,
+        
+        "structure": """
+            if (state.viewer) {
+                // Decode the payload once, then coalesce loads requested within
+                // one animation frame (e.g. structure + filetype)
+                state.decodeStructure(() => state.scheduleRender('load', state.loadStructure));
             }
         """,
         
-        "background_color": """
+        "_structure": """
+            self.structure();
+        """,
+        
+        "filetype": """
             if (state.viewer) {
-                state.viewer.setBackgroundColor(data.background_color || "white");
-                state.viewer.render();
+                // Wait for a structure sent alongside it to finish decoding, so the
+                // new format is never applied to the previous text
+                state.decodeStructure(() => {
+                    if (state.structureText) {
+                        state.scheduleRender('load', state.loadStructure);
+                    }
+                });
             }
         """,
         
-        "show_stick": """
-            if (state.viewer && data.structure) {
-                const style = {};
-                if (data.show_stick) style.stick = {radius: 0.15};
-                if (data.show_sphere) style.sphere = {radius: 0.3};
-                if (data.show_cartoon) style.cartoon = {};
-                if (data.show_line) style.line = {};
-                if (data.show_surface) style.surface = {};
-                
-                if (Object.keys(style).length === 0) {
-                    style.stick = {radius: 0.15};
-                    style.sphere = {radius: 0.3};
-                }
-                
-                state.viewer.setStyle({}, style);
-                state.viewer.render();
+        "_trajectory": """
+            if (!state.viewer) {
+                return;
+            }
+            if (data._trajectory && data._trajectory.byteLength) {
+                // Same key as the structure loader, so a clear queued by addTrajectory
+                // resetting structure is replaced by this load
+                state.scheduleRender('load', state.loadTrajectory);
+            } else if (!state.structureText) {
+                // clear() after addTrajectory: structure was already empty, so this is
+                // the only update telling the browser to drop the trajectory
+                state.scheduleRender('load', state.loadStructure);
             }
         """,
         
-        "show_sphere": """
-            if (state.viewer && data.structure) {
-                const style = {};
-                if (data.show_stick) style.stick = {radius: 0.15};
-                if (data.show_sphere) style.sphere = {radius: 0.3};
-                if (data.show_cartoon) style.cartoon = {};
-                if (data.show_line) style.line = {};
-                if (data.show_surface) style.surface = {};
-                
-                if (Object.keys(style).length === 0) {
-                    style.stick = {radius: 0.15};
-                    style.sphere = {radius: 0.3};
-                }
-                
-                state.viewer.setStyle({}, style);
-                state.viewer.render();
+        "_trajectory_symbols": """
+            if (state.viewer && data._trajectory && data._trajectory.byteLength) {
+                state.scheduleRender('load', state.loadTrajectory);
             }
         """,
         
-        "show_cartoon": """
-            if (state.viewer && data.structure) {
-                const style = {};
-                if (data.show_stick) style.stick = {radius: 0.15};
-                if (data.show_sphere) style.sphere = {radius: 0.3};
-                if (data.show_cartoon) style.cartoon = {};
-                if (data.show_line) style.line = {};
-                if (data.show_surface) style.surface = {};
-                
-                if (Object.keys(style).length === 0) {
-                    style.stick = {radius: 0.15};
-                    style.sphere = {radius: 0.3};
-                }
-                
-                state.viewer.setStyle({}, style);
-                state.viewer.render();
+        "_trajectory_scale": """
+            if (state.viewer && data._trajectory && data._trajectory.byteLength) {
+                state.scheduleRender('load', state.loadTrajectory);
             }
         """,
         
-        "show_line": """
-            if (state.viewer && data.structure) {
-                const style = {};
-                if (data.show_stick) style.stick = {radius: 0.15};
-                if (data.show_sphere) style.sphere = {radius: 0.3};
-                if (data.show_cartoon) style.cartoon = {};
-                if (data.show_line) style.line = {};
-                if (data.show_surface) style.surface = {};
-                
-                if (Object.keys(style).length === 0) {
-                    style.stick = {radius: 0.15};
-                    style.sphere = {radius: 0.3};
-                }
-                
-                state.viewer.setStyle({}, style);
-                state.viewer.render();
+        "_frame_payload": """
+            if (state.viewer && data._lazy_frames) {
+                state.receiveFrame(data._frame_payload);
             }
         """,
         
-        "show_surface": """
-            if (state.viewer && data.structure) {
-                const style = {};
-                if (data.show_stick) style.stick = {radius: 0.15};
-                if (data.show_sphere) style.sphere = {radius: 0.3};
-                if (data.show_cartoon) style.cartoon = {};
-                if (data.show_line) style.line = {};
-                if (data.show_surface) style.surface = {};
-                
-                if (Object.keys(style).length === 0) {
-                    style.stick = {radius: 0.15};
-                    style.sphere = {radius: 0.3};
-                }
-                
-                state.viewer.setStyle({}, style);
-                state.viewer.render();
+        "_render_tick": """
+            if (state.viewer) {
+                state.scheduleRender('draw', state.render);
             }
         """,
         
-        "labels": """
+        "_center_tick": """
             if (state.viewer) {
-                // Clear existing labels
-                state.viewer.removeAllLabels();
-                
-                // Add custom labels
-                if (data.labels && Array.isArray(data.labels)) {
-                    data.labels.forEach(label => {
-                        state.viewer.addLabel(label.text, label.options || {});
-                    });
-                }
-                
-                state.viewer.render();
+                state.scheduleRender('center', () => {
+                    state.viewer.zoomTo();
+                    state.render();
+                });
             }
         """,
         
-        "show_atom_labels": """
-            if (state.viewer && data.structure) {
-                // Clear existing labels
-                state.viewer.removeAllLabels();
-                
-                // Add atom labels if enabled
-                if (data.show_atom_labels) {
-                    const lines = data.structure.trim().split('\\n');
-                    
-                    if (data.filetype === 'xyz' && lines.length > 2) {
-                        const natoms = parseInt(lines[0]);
-                        const atomLines = lines.slice(2, 2 + natoms);
-                        
-                        atomLines.forEach((line, idx) => {
-                            const parts = line.trim().split(/\\s+/);
-                            if (parts.length >= 4) {
-                                const x = parseFloat(parts[1]);
-                                const y = parseFloat(parts[2]);
-                                const z = parseFloat(parts[3]);
-                                
-                                state.viewer.addLabel(String(idx + 1), {
-                                    position: {x: x, y: y, z: z},
-                                    backgroundColor: 'white',
-                                    backgroundOpacity: 0,
-                                    fontColor: 'blue',
-                                    font: 'arial',
-                                    fontSize: 16,
-                                    fontOpacity: 1.0,
-                                    inFront: true
-                                });
-                            }
-                        });
-                    } else if (data.filetype === 'pdb') {
-                        const atomLines = lines.filter(line => line.startsWith('ATOM') || line.startsWith('HETATM'));
-                        
-                        atomLines.forEach((line, idx) => {
-                            const x = parseFloat(line.substring(30, 38).trim());
-                            const y = parseFloat(line.substring(38, 46).trim());
-                            const z = parseFloat(line.substring(46, 54).trim());
-                            
-                            state.viewer.addLabel(String(idx + 1), {
-                                position: {x: x, y: y, z: z},
-                                backgroundColor: 'white',
-                                backgroundOpacity: 0,
-                                fontColor: 'blue',
-                                font: 'arial',
-                                fontSize: 16,
-                                fontOpacity: 1.0,
-                                inFront: true
-                            });
-                        });
-                    }
+        "background_color": """
+            // Trailing-edge debounce: a color picker drag fires many updates per
+            // second, 50ms is below what reads as lag but drops the in-between colors
+            clearTimeout(state.bgTimer);
+            state.bgTimer = setTimeout(() => {
+                if (state.viewer) {
+                    state.viewer.setBackgroundColor(data.background_color || "white");
+                    state.scheduleRender('draw', state.render);
                 }
-                
-                // Re-add custom labels
-                if (data.labels && Array.isArray(data.labels)) {
-                    data.labels.forEach(label => {
-                        state.viewer.addLabel(label.text, label.options || {});
-                    });
+            }, 50);
+        """,
+
+        "style_spec": """
+            // Each checkbox click in a group of show_* toggles arrives as its own
+            // style_spec update; wait 30ms so a burst restyles and redraws once
+            clearTimeout(state.styleTimer);
+            state.styleTimer = setTimeout(() => {
+                if (state.viewer && state.applyStyle) {
+                    state.scheduleRender('style', state.applyStyle);
                 }
-                
-                state.viewer.render();
+            }, 30);
+        """,
+        
+        "labels": """
+            if (state.viewer) {
+                // removeAllLabels also drops the atom number labels, so rebuild both;
+                // every label is added with noshow and drawn by the single render below
+                state.scheduleRender('labels', () => {
+                    state.rebuildLabels();
+                    state.render();
+                });
             }
         """,
         
-        "current_frame": """
-            // Update the frame display elements
-            const currentFrameSpan = document.getElementById('current-frame');
-            const totalFramesSpan = document.getElementById('total-frames');
-            if (currentFrameSpan) {
-                currentFrameSpan.textContent = data.current_frame;
+        "show_atom_labels": """
+            if (state.viewer && state.structureText) {
+                state.scheduleRender('labels', () => {
+                    state.rebuildLabels();
+                    state.render();
+                });
             }
-            if (totalFramesSpan) {
-                totalFramesSpan.textContent = data.total_frames;
+        """,
+        
+        "_atom_coords": """
+            // Synced after show_atom_labels, so a rebuild queued by the toggle may have
+            // run before the coordinates arrived; rebuild again once they are here
+            if (state.viewer && state.structureText && data.show_atom_labels) {
+                state.scheduleRender('labels', () => {
+                    state.rebuildLabels();
+                    state.render();
+                });
             }
-            
+        """,
+        
+        "current_frame": """
+            state.updateFrameCounter();
             if (state.viewer) {
-                try {
-                    if (typeof state.viewer.setFrame === 'function') {
-                        state.viewer.setFrame(data.current_frame);
-                        
-                        if (typeof state.viewer.render === 'function') {
-                            state.viewer.render();
-                        }
-                    }
-                } catch (err) {
-                    // Try fallback render
-                    try {
-                        if (state.viewer.render) {
-                            state.viewer.render();
-                        }
-                    } catch (renderErr) {
-                        console.error('Frame update failed:', renderErr);
-                    }
-                }
+                state.seekFrame();
             }
         """,
         
         "animate": """
             if (state.viewer && data.total_frames > 1) {
                 if (data.animate) {
-                    // Use 3Dmol.js built-in animate method with custom options support
-                    try {
-                        // Merge custom animate_options with defaults
-                        const defaultOptions = {
-                            loop: 'forward',
-                            interval: data.animation_speed || 200,
-                            reps: 0  // Infinite loop
-                        };
-                        
-                        const animateOptions = Object.assign({}, defaultOptions, data.animate_options || {});
-                        console.log('🎬 Starting animation with options:', animateOptions);
-                        
-                        state.viewer.animate(animateOptions);
-                        state.animating = true;
-                        
-                        // Reduced frequency frame sync to minimize comm overhead but maintain sync
-                        let lastSyncTime = 0;
-                        const SYNC_THROTTLE = 200; // Sync every 200ms max to reduce messages
-                        
-                        state.sync_interval = setInterval(() => {
-                            if (state.viewer && state.animating) {
-                                const now = Date.now();
-                                if ((now - lastSyncTime) >= SYNC_THROTTLE) {
-                                    try {
-                                        if (typeof state.viewer.getFrame === 'function') {
-                                            const currentFrame = state.viewer.getFrame();
-                                            if (data.current_frame !== currentFrame) {
-                                                data.current_frame = currentFrame;
-                                                lastSyncTime = now;
-                                            }
-                                        }
-                                    } catch (err) {
-                                        // Silently handle frame sync errors
-                                    }
-                                }
-                            }
-                        }, SYNC_THROTTLE);
-                        
-                    } catch (err) {
-                        console.error('Error starting 3Dmol.js animation:', err);
-                    }
+                    state.log('🎬 Starting animation');
+                    state.startPlayback();
                 } else {
-                    // Stop frame sync polling
-                    if (state.sync_interval) {
-                        clearInterval(state.sync_interval);
-                        state.sync_interval = null;
-                    }
-                    
-                    // Stop 3Dmol.js animation immediately
-                    try {
-                        if (state.viewer.stopAnimate) {
-                            state.viewer.stopAnimate();
-                        }
-                        if (state.viewer.pauseAnimate) {
-                            state.viewer.pauseAnimate();
-                        }
-                        state.animating = false;
-                        console.log('⏹️ Animation stopped');
-                    } catch (err) {
-                        console.error('Error stopping 3Dmol.js animation:', err);
-                    }
+                    state.stopPlayback();
+                    state.log('⏹️ Animation stopped');
                 }
             }
         """,
         
         "animation_speed": """
-            // Always respond to animation speed changes, whether animating or not
-            console.log('🎚️ Animation speed changed to:', data.animation_speed, 'ms');
-            
-            if (state.viewer && data.total_frames > 1) {
-                // If currently animating, restart with new speed
-                if (state.animating) {
-                    console.log('🔄 Restarting animation with new speed...');
-                    
-                    // Stop current animation and sync
-                    if (state.sync_interval) {
-                        clearInterval(state.sync_interval);
-                        state.sync_interval = null;
-                    }
-                    
-                    try {
-                        if (state.viewer.stopAnimate) {
-                            state.viewer.stopAnimate();
-                        }
-                        
-                        // Use custom options if available, otherwise defaults
-                        const defaultOptions = {
-                            loop: 'forward',
-                            interval: data.animation_speed,
-                            reps: 0
-                        };
-                        
-                        const animateOptions = Object.assign({}, defaultOptions, data.animate_options || {});
-                        
-                        // Restart animation with new speed
-                        state.viewer.animate(animateOptions);
-                        
-                        // Restart throttled frame sync
-                        let lastSyncTime = 0;
-                        const SYNC_THROTTLE = 200;
-                        
-                        state.sync_interval = setInterval(() => {
-                            if (state.viewer && state.animating) {
-                                const now = Date.now();
-                                if ((now - lastSyncTime) >= SYNC_THROTTLE) {
-                                    try {
-                                        if (typeof state.viewer.getFrame === 'function') {
-                                            const currentFrame = state.viewer.getFrame();
-                                            if (data.current_frame !== currentFrame) {
-                                                data.current_frame = currentFrame;
-                                                lastSyncTime = now;
-                                            }
-                                        }
-                                    } catch (err) {
-                                        // Silently handle sync errors
-                                    }
-                                }
-                            }
-                        }, SYNC_THROTTLE);
-                        
-                        console.log('✅ Animation restarted with speed:', data.animation_speed, 'ms');
-                        
-                    } catch (err) {
-                        console.error('Error updating animation speed:', err);
-                    }
-                } else {
-                    console.log('📝 Animation speed updated (not currently animating)');
-                }
+            // Restart a running animation with the new interval
+            if (state.viewer && state.animating) {
+                state.startPlayback();
             }
         """,
         
         "total_frames": """
-            // Update the total frames display
-            const totalFramesSpan = document.getElementById('total-frames');
-            if (totalFramesSpan) {
-                totalFramesSpan.textContent = data.total_frames;
-            }
+            state.updateFrameCounter();
             
             if (state.viewer) {
                 // Update frame bounds when total frames changes
                 if (data.current_frame >= data.total_frames) {
                     // Reset to first frame if current frame is out of bounds
                     state.viewer.setFrame(0);
-                    state.viewer.render();
+                    state.scheduleRender('draw', state.render);
                 }
             }
         """
-    }
+    })
     
     # JavaScript dependencies
-    __javascript__ = [
-        "https://3dmol.org/build/3Dmol.js"
-    ]
+    __javascript__ = [THREEDMOL_JS_URL]
     
     def __init__(self, **params):
         super().__init__(**params)
         self._labels_list = []  # Internal storage for labels
-        self._updating_frame = False  # Flag to prevent feedback loops
+        self._labels_held = 0  # Nesting depth of batchLabels blocks
         self._frame_structures = []  # Storage for frame structures
-        
+        self._updating_style = False  # Flag to keep setStyle's style_spec as given
+        self._raw_payload = None  # (structure, payload) prepared by addModel from bytes
+        self._coords_cache = None  # (filetype, structure, coords) of the last parse
+        # Registered before the structure encoder so the coordinates reach the
+        # browser ahead of the structure payload they belong to
+        self.param.watch(self._update_atom_coords, ['structure', 'filetype', 'show_atom_labels'])
+        self._update_atom_coords()
+        self.param.watch(self._encode_structure, 'structure')
+        self._encode_structure()
+        self.param.watch(self._send_frame, '_frame_request')
+        self.param.watch(self._update_style_spec,
+                         ['show_stick', 'show_sphere', 'show_cartoon', 'show_line', 'show_surface'])
+        self.param.watch(self._update_style_flags, 'style_spec')
+        if 'style_spec' in params:
+            self._update_style_flags()  # An explicit style wins over the show_* defaults
+        else:
+            self._update_style_spec()
+    
+    def _update_style_spec(self, *events):
+        """Rebuild style_spec after show_* flags are toggled directly"""
+        if self._updating_style:
+            return
+        enabled = [rep for rep in self._default_styles if getattr(self, f'show_{rep}')]
+        current = [rep for rep in self._default_styles if rep in self.style_spec]
+        if enabled == current:
+            return
+        # Keep the options of representations that stay enabled, and any
+        # representation without a show_* flag (e.g. cross)
+        spec = {rep: self.style_spec.get(rep, self._default_styles[rep]) for rep in enabled}
+        spec.update((rep, options) for rep, options in self.style_spec.items()
+                    if rep not in self._default_styles)
+        # The fallback only goes into the spec; the flags stay as the user left them
+        self._updating_style = True
+        try:
+            self.style_spec = spec or dict(self._fallback_style)
+        finally:
+            self._updating_style = False
+    
+    def _style_flags(self, spec):
+        """show_* flag values mirroring a style spec"""
+        return {f'show_{rep}': rep in spec for rep in self._default_styles}
+    
+    def _update_style_flags(self, *events):
+        """Mirror the show_* flags after style_spec is assigned directly"""
+        if self._updating_style:
+            return
+        self._updating_style = True
+        try:
+            self.param.update(**self._style_flags(self.style_spec))
+        finally:
+            self._updating_style = False
+    
+    def _update_atom_coords(self, *events):
+        """Send the atom coordinates used by show_atom_labels (only while enabled)"""
+        if not (self.show_atom_labels and self.structure):
+            self._atom_coords = b""
+            return
+        try:
+            coords = self._atom_coordinates()
+        except (ValueError, IndexError) as e:
+            # Runs as a structure watcher ahead of the encoder: a bad atom line must
+            # only cost the atom labels, never abort the structure load itself
+            self.param.warning(f"Atom labels skipped, could not parse coordinates: {e}")
+            coords = np.empty((0, 3))
+        self._atom_coords = coords.astype('<f4').tobytes()
+    
+    def _encode_structure(self, *events):
+        """Encode structure into the binary payload synced to the browser"""
+        if events and events[0].old is events[0].new:
+            # param.trigger('structure'): the browser already holds this payload, so
+            # redraw through the payload-free center event instead of resending it
+            self.param.trigger('_center_tick')
+            return
+        raw, self._raw_payload = self._raw_payload, None
+        if raw is not None and raw[0] is self.structure:
+            # addModel was given file bytes: send those instead of re-encoding the text
+            self._structure = raw[1]
+        else:
+            self._structure = self._encode_text(self.structure)
+    
+    def _encode_text(self, text):
+        """UTF-8 encode text for the browser, gzip-compressed from _gzip_threshold bytes"""
+        return self._encode_bytes(text.encode('utf-8'))
+    
+    def _encode_bytes(self, payload):
+        """Gzip-compress a UTF-8 payload once it reaches _gzip_threshold bytes"""
+        if len(payload) >= self._gzip_threshold:
+            payload = gzip.compress(payload, compresslevel=6, mtime=0)
+        return payload
+    
+    def _send_frame(self, event):
+        """Answer a lazy frame request from the browser with all the frames it asked for"""
+        if not event.new:
+            return
+        request_id, *indices = event.new
+        frames = [(index, self._encode_text(self._frame_structures[index]))
+                  for index in indices if 0 <= index < len(self._frame_structures)]
+        header = [request_id, len(frames)]
+        for index, payload in frames:
+            header += [index, len(payload)]
+        self._frame_payload = (np.array(header, dtype='<u4').tobytes()
+                               + b"".join(payload for _, payload in frames))
     
     # py3dmol-compatible API methods
     def addModel(self, data, format):
-        """Add a molecular model to the viewer (py3dmol compatible)"""
-        self.structure = data
-        self.filetype = format
+        """Add a molecular model to the viewer (py3dmol compatible)
+        
+        ``data`` may also be the raw file bytes (e.g. from a file upload), optionally
+        gzip-compressed; they are sent to the browser as they are rather than being
+        decoded and encoded again.
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            raw = bytes(data)
+            if raw[:2] == b'\x1f\x8b':
+                payload, raw = raw, gzip.decompress(raw)
+            else:
+                payload = self._encode_bytes(raw)
+            # Decode like the browser's TextDecoder, which replaces invalid bytes
+            data = raw.decode('utf-8', errors='replace')
+            self._raw_payload = (data, payload)
+        self._trajectory = b""
+        self._frame_structures = []
+        self._lazy_frames = False
+        # One batch, so structure-dependent watchers see the new filetype too
+        self.param.update(structure=data, filetype=format)
         return self
     
     def setStyle(self, selection={}, style={}):
         """Set molecular style (py3dmol compatible)"""
-        self.show_stick = False
-        self.show_sphere = False
-        self.show_cartoon = False
-        self.show_line = False
-        self.show_surface = False
-        
-        if 'stick' in style:
-            self.show_stick = True
-        if 'sphere' in style:
-            self.show_sphere = True
-        if 'cartoon' in style:
-            self.show_cartoon = True
-        if 'line' in style:
-            self.show_line = True
-        if 'surface' in style:
-            self.show_surface = True
-            
-        if not any([self.show_stick, self.show_sphere, self.show_cartoon, 
-                   self.show_line, self.show_surface]):
-            self.show_stick = True
-            self.show_sphere = True
-            
+        spec = dict(style) or dict(self._fallback_style)
+        
+        # style_spec is the only synced value; the flags just mirror it
+        self._updating_style = True
+        try:
+            self.param.update(style_spec=spec, **self._style_flags(spec))
+        finally:
+            self._updating_style = False
         return self
     
     def setBackgroundColor(self, color):
@@ -687,17 +1166,21 @@ class Mol3DViewer(ReactiveHTML):
     
     def render(self):
         """Force render update (py3dmol compatible)"""
-        self.param.trigger('structure')
+        self.param.trigger('_render_tick')
         return self
     
     def clear(self):
         """Clear all models (py3dmol compatible)"""
-        self.structure = ""
+        self._frame_structures = []
+        self.param.update(
+            structure="", _lazy_frames=False, _trajectory=b"", _trajectory_symbols=[],
+            _trajectory_scale=[], total_frames=1, current_frame=0,
+        )
         return self
     
     def center(self):
         """Center/zoom to molecule (py3dmol compatible)"""
-        self.param.trigger('structure')
+        self.param.trigger('_center_tick')
         return self
     
     def addLabel(self, text, options=None):
@@ -711,9 +1194,42 @@ class Mol3DViewer(ReactiveHTML):
         }
         
         self._labels_list.append(label)
-        self.labels = self._labels_list.copy()  # Trigger reactivity
+        if not self._labels_held:
+            self.labels = self._labels_list.copy()  # Trigger reactivity
         return self
-    
+
+    @contextmanager
+    def batchLabels(self):
+        """Collect addLabel calls made inside the block into one labels update.
+
+        >>> with viewer.batchLabels():
+        ...     for text, options in items:
+        ...         viewer.addLabel(text, options)
+        """
+        self._labels_held += 1
+        try:
+            yield self
+        finally:
+            self._labels_held -= 1
+            if not self._labels_held:
+                self.labels = self._labels_list.copy()  # Trigger reactivity once
+
+    def addLabels(self, labels):
+        """Add many labels with a single update instead of one addLabel call per label.
+
+        Each item is either ``{'text': ..., 'options': {...}}`` or a flat dict such as
+        ``{'text': '1', 'position': {...}, 'fontColor': 'blue'}`` whose remaining keys
+        are used as the label options.
+        """
+        for label in labels:
+            label = dict(label)
+            text = label.pop('text')
+            options = label.pop('options', label)
+            self._labels_list.append({'text': text, 'options': options})
+
+        self.labels = self._labels_list.copy()  # Trigger reactivity once
+        return self
+
     def removeAllLabels(self):
         """Remove all labels from the viewer (py3dmol compatible)"""
         self._labels_list = []
@@ -725,59 +1241,60 @@ class Mol3DViewer(ReactiveHTML):
         self.show_atom_labels = show
         return self
     
+    def _atom_coordinates(self):
+        """Atom coordinates of the current structure as an (natoms, 3) float array"""
+        # Label toggles and repeated autoLabel calls reuse the last parse; str
+        # equality short-circuits on identity, so the usual hit costs no scan
+        cache = self._coords_cache
+        if cache is not None and cache[0] == self.filetype and cache[1] == self.structure:
+            return cache[2]
+        coords = self._parse_atom_coordinates()
+        coords.setflags(write=False)
+        self._coords_cache = (self.filetype, self.structure, coords)
+        return coords
+    
+    def _parse_atom_coordinates(self):
+        """Parse atom coordinates out of the XYZ or PDB structure text"""
+        lines = self.structure.strip().splitlines()
+        
+        if self.filetype == 'xyz' and len(lines) > 2 and lines[0].strip().isdigit():
+            atom_lines = lines[2:2 + int(lines[0])]
+            if not atom_lines:
+                return np.empty((0, 3))
+            try:
+                return np.loadtxt(atom_lines, usecols=(1, 2, 3), ndmin=2)
+            except ValueError:
+                # Ragged atom lines: keep the ones that carry coordinates
+                rows = [line.split()[1:4] for line in atom_lines]
+                return np.array([row for row in rows if len(row) == 3], dtype=float).reshape(-1, 3)
+        
+        elif self.filetype == 'pdb':
+            # Multi-model files (e.g. joined addFrames frames) label the first model only
+            lines = self.structure.split('\nENDMDL', 1)[0].splitlines()
+            # Join the records into one fixed-width buffer and let numpy slice and
+            # convert the coordinate columns, instead of three substrings per atom
+            records = ''.join([line[:54] for line in lines
+                               if line.startswith(('ATOM', 'HETATM')) and len(line) >= 54])
+            buffer = records.encode('ascii', 'replace')  # one byte per column
+            return np.frombuffer(buffer, dtype=self._pdb_atom_record)['xyz'].astype(float)
+        
+        return np.empty((0, 3))
+    
     def autoLabel(self):
         """Automatically add atom index labels based on structure"""
         if not self.structure:
             return self
-            
-        lines = self.structure.strip().split('\n')
-        
-        if self.filetype == 'xyz' and len(lines) > 2:
-            natoms = int(lines[0])
-            atom_lines = lines[2:2 + natoms]
-            
-            for idx, line in enumerate(atom_lines):
-                parts = line.split()
-                if len(parts) >= 4:
-                    x, y, z = map(float, parts[1:4])
-                    self.addLabel(str(idx + 1), {
-                        'position': {'x': x, 'y': y, 'z': z},
-                        'backgroundColor': 'white',
-                        'backgroundOpacity': 0,
-                        'fontColor': 'blue',
-                        'font': 'arial',
-                        'fontSize': 16,
-                        'fontOpacity': 1.0,
-                        'inFront': True
-                    })
         
-        elif self.filetype == 'pdb':
-            atom_lines = [line for line in lines if line.startswith(('ATOM', 'HETATM'))]
-            
-            for idx, line in enumerate(atom_lines):
-                if len(line) >= 54:
-                    x = float(line[30:38].strip())
-                    y = float(line[38:46].strip()) 
-                    z = float(line[46:54].strip())
-                    self.addLabel(str(idx + 1), {
-                        'position': {'x': x, 'y': y, 'z': z},
-                        'backgroundColor': 'white',
-                        'backgroundOpacity': 0,
-                        'fontColor': 'blue',
-                        'font': 'arial',
-                        'fontSize': 16,
-                        'fontOpacity': 1.0,
-                        'inFront': True
-                    })
-        
-        return self
+        coords = self._atom_coordinates()
+        return self.addLabels([
+            {'text': str(idx + 1), 'options': {'position': {'x': x, 'y': y, 'z': z}, **self._atom_label_style}}
+            for idx, (x, y, z) in enumerate(coords.tolist())
+        ])
     
     def setFrame(self, frame):
         """Set the current animation frame (py3dmol compatible)"""
         if 0 <= frame < self.total_frames:
-            self._updating_frame = True
             self.current_frame = frame
-            self._updating_frame = False
         return self
     
     def getFrame(self):
@@ -821,35 +1338,99 @@ class Mol3DViewer(ReactiveHTML):
         return self
     
     def addFrames(self, structures, filetype=None):
-        """Add multiple structures as animation frames"""
+        """Add multiple structures as animation frames
+        
+        XYZ and PDB frames are joined into one multi-frame model (PDB frames as
+        MODEL/ENDMDL records), which 3Dmol.js loads once with addModelsAsFrames so
+        a frame change only swaps atom positions. Other formats, and frame sets
+        totalling at least ``_lazy_frames_threshold`` characters, are kept in Python
+        instead: the browser gets the first frame and then asks for the frames
+        around ``current_frame`` as they are needed.
+        """
         if filetype is None:
             filetype = self.filetype
-            
+        
         if isinstance(structures, list):
-            # Multiple structures - create multi-frame content
-            if filetype == 'xyz':
-                # For 3Dmol.js addModelsAsFrames, we need to create a proper multi-frame XYZ format
-                # Each frame should be separated without extra newlines between frames
-                combined_frames = []
-                for structure in structures:
-                    combined_frames.append(structure.strip())
-                self.structure = "\n".join(combined_frames)
-            else:
-                # For other formats, just use the first structure for now
-                # TODO: Implement proper multi-frame support for PDB/SDF
-                self.structure = structures[0] if structures else ""
-            
-            self.total_frames = len(structures)
-            self.current_frame = 0
             # Store the structures for proper 3Dmol.js handling
             self._frame_structures = structures
+            lazy = (filetype not in ('xyz', 'pdb')
+                    or sum(map(len, structures)) >= self._lazy_frames_threshold)
+            if lazy:
+                structure = structures[0] if structures else ""
+            elif filetype == 'pdb':
+                structure = self._join_pdb_frames(structures)
+            else:
+                # For 3Dmol.js addModelsAsFrames, we need to create a proper multi-frame XYZ format
+                # Each frame should be separated without extra newlines between frames
+                structure = "\n".join([frame.strip() for frame in structures])
+            total_frames = len(structures)
         else:
             # Single structure
-            self.structure = structures
-            self.total_frames = 1
-            self.current_frame = 0
             self._frame_structures = [structures]
-            
+            lazy = False
+            structure = structures
+            total_frames = 1
+        
+        # One batched update: the browser gets a single message and reloads once,
+        # and values equal to the current ones (e.g. re-adding the same frames)
+        # trigger nothing
+        self.param.update(
+            _trajectory=b"", _lazy_frames=lazy, structure=structure, filetype=filetype,
+            total_frames=total_frames, current_frame=0,
+        )
+        return self
+    
+    @staticmethod
+    def _join_pdb_frames(structures):
+        """Join PDB frames into one file with a MODEL/ENDMDL record per frame"""
+        lines = []
+        for index, structure in enumerate(structures, 1):
+            lines.append(f"MODEL     {index:>4}")
+            lines.extend(line for line in structure.strip().splitlines()
+                         if not line.startswith(('MODEL', 'ENDMDL', 'END')))
+            lines.append("ENDMDL")
+        lines.append("END")
+        return "\n".join(lines)
+    
+    def addTrajectory(self, symbols, coords, quantize=False):
+        """Add a trajectory as animation frames from one symbol list and a coordinate array
+        
+        ``coords`` has shape (n_frames, natoms, 3) (or (natoms, 3) for a single frame).
+        The coordinates are sent as a raw float32 buffer instead of one XYZ string per
+        frame, so symbols and number formatting are not repeated for every frame.
+        
+        With ``quantize=True`` each coordinate is sent as an int16 step within the
+        trajectory's extent on that axis, halving the payload; the rounding error is
+        at most extent / 131070 (under 0.001 Å for a 100 Å box).
+        """
+        symbols = [str(symbol) for symbol in symbols]
+        coords = np.asarray(coords, dtype='<f4')  # little-endian float32, as read by Float32Array
+        if coords.ndim == 2:
+            coords = coords[np.newaxis]
+        if coords.ndim != 3 or coords.shape[1:] != (len(symbols), 3):
+            raise ValueError(
+                f"coords must have shape (n_frames, {len(symbols)}, 3), got {coords.shape}"
+            )
+        
+        if quantize and coords.size:
+            low, high = coords.min(axis=(0, 1)), coords.max(axis=(0, 1))
+            offset = (low + high) / 2
+            step = np.where(high > low, (high - low) / 65535, 1).astype('<f4')
+            steps = np.rint((coords - offset) / step)
+            scale = offset.tolist() + step.tolist()
+            payload = np.clip(steps, -32768, 32767).astype('<i2').tobytes()
+        else:
+            scale = []
+            payload = np.ascontiguousarray(coords).tobytes()
+        
+        # One batched update, like addFrames; the browser reloads the trajectory when
+        # any of the payload, symbols or scale changes
+        self._frame_structures = []
+        self.param.update(
+            structure="", filetype='xyz', _lazy_frames=False, _trajectory=payload,
+            _trajectory_symbols=symbols, _trajectory_scale=scale,
+            total_frames=max(len(coords), 1), current_frame=0,
+        )
         return self
 
 # Factory function for easier usage (py3dmol compatible)
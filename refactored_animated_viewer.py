@@ -70,16 +70,19 @@ try:
 except FileNotFoundError:
     # Create demo data
     xyz_frames = []
+    # One format string per frame instead of six f-string fields
+    frame_template = """6
+DMF frame %d
+N    0.000000    0.000000    0.000000
+C    %.6f    0.000000    0.000000
+C   %.6f    0.000000    0.000000
+H    %.6f    %.6f    0.000000
+H    %.6f   %.6f    0.000000
+O   %.6f    0.000000    0.000000"""
     for i in range(20):
         scale = 1.0 + 0.3 * (i / 19.0)
-        frame = f"""6
-DMF frame {i+1}
-N    0.000000    0.000000    0.000000
-C    {1.2*scale:.6f}    0.000000    0.000000
-C   {-1.2*scale:.6f}    0.000000    0.000000
-H    {1.8*scale:.6f}    {0.8*scale:.6f}    0.000000
-H    {1.8*scale:.6f}   {-0.8*scale:.6f}    0.000000
-O   {-2.0*scale:.6f}    0.000000    0.000000"""
+        frame = frame_template % (i + 1, 1.2*scale, -1.2*scale, 1.8*scale, 0.8*scale,
+                                  1.8*scale, -0.8*scale, -2.0*scale)
         xyz_frames.append(frame)
     
     # Create demo energy data
@@ -118,7 +121,8 @@ class AnimatedMolecularViewer(param.Parameterized):
             show_atom_labels=True,
             animate=False,  # CRITICAL: Disable built-in animation completely
             current_frame=0,
-            total_frames=num_frames
+            total_frames=num_frames,
+            frame_sync_interval=200  # Info panel and energy plot follow playback
         )
         
         # Load all frames using panel-3dmol's addFrames method
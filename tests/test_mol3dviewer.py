@@ -88,6 +88,49 @@ ATOM      6  C   CAF     1      -0.744  -0.037   0.000  1.00  0.00           C
         assert viewer.structure == self.caffeine_pdb
         assert viewer.filetype == 'pdb'
 
+    def test_add_model_bytes(self):
+        """Test addModel sends raw (and gzip-compressed) file bytes as given"""
+        import gzip
+        
+        viewer = Mol3DViewer()
+        viewer.addModel(self.benzene_xyz.encode(), 'xyz')
+        assert viewer.structure == self.benzene_xyz
+        assert viewer._structure == self.benzene_xyz.encode()
+        
+        compressed = gzip.compress(self.caffeine_pdb.encode())
+        viewer.addModel(compressed, 'pdb')
+        assert viewer.structure == self.caffeine_pdb
+        assert viewer._structure is compressed
+        
+        # A later text structure is encoded as usual
+        viewer.structure = self.benzene_xyz
+        assert viewer._structure == self.benzene_xyz.encode()
+
+    def test_style_spec_argument(self):
+        """Test an explicit style_spec is kept and the show_* flags follow it"""
+        viewer = Mol3DViewer(style_spec={'cartoon': {'color': 'spectrum'}})
+        assert viewer.style_spec == {'cartoon': {'color': 'spectrum'}}
+        assert viewer.show_cartoon == True
+        assert viewer.show_stick == False
+        
+        # Assigning style_spec directly mirrors the flags, so a later toggle keeps it
+        viewer.style_spec = {'line': {}}
+        assert viewer.show_line == True
+        assert viewer.show_stick == False
+        viewer.show_sphere = True
+        assert viewer.style_spec == {'sphere': {'radius': 0.3}, 'line': {}}
+
+        # Unchecking every flag falls back to stick+sphere in the spec only
+        viewer.param.update(show_sphere=False, show_line=False)
+        assert viewer.style_spec == {'stick': {'radius': 0.15}, 'sphere': {'radius': 0.3}}
+        assert not any([viewer.show_stick, viewer.show_sphere, viewer.show_line])
+
+        # Representations without a flag set none and survive flag toggles
+        viewer.style_spec = {'cross': {'linewidth': 2}}
+        assert not any([viewer.show_stick, viewer.show_sphere, viewer.show_cartoon])
+        viewer.show_stick = True
+        assert viewer.style_spec == {'stick': {'radius': 0.15}, 'cross': {'linewidth': 2}}
+
     def test_set_style_method(self):
         """Test py3dmol-compatible setStyle method"""
         viewer = Mol3DViewer()
@@ -111,6 +154,35 @@ ATOM      6  C   CAF     1      -0.744  -0.037   0.000  1.00  0.00           C
         assert viewer.show_stick == False
         assert viewer.show_sphere == False
         
+        # setStyle keeps the given options in style_spec
+        viewer.setStyle({}, {'stick': {'radius': 0.2}, 'line': {}})
+        assert viewer.style_spec == {'stick': {'radius': 0.2}, 'line': {}}
+        assert viewer.show_line == True
+        
+        # Toggling a flag directly rewrites style_spec, keeping existing options
+        viewer.show_sphere = True
+        assert viewer.style_spec == {'stick': {'radius': 0.2}, 'sphere': {'radius': 0.3}, 'line': {}}
+        viewer.show_line = False
+        assert viewer.style_spec == {'stick': {'radius': 0.2}, 'sphere': {'radius': 0.3}}
+        
+        # Only style_spec is synced to the frontend
+        model = viewer.get_root()
+        assert 'style_spec' in model.data.properties_with_values()
+        assert 'show_stick' not in model.data.properties_with_values()
+        
+        # All style flags change in a single batched update
+        batches = []
+        viewer.param.watch(lambda *events: batches.append(events), ['show_stick', 'show_sphere', 'show_cartoon'])
+        viewer.setStyle({}, {'cartoon': {}})
+        assert len(batches) == 1
+        assert viewer.show_cartoon and not viewer.show_stick and not viewer.show_sphere
+        
+        # Toggling several flags together sends a single style_spec update
+        specs = []
+        viewer.param.watch(lambda event: specs.append(event.new), 'style_spec')
+        viewer.param.update(show_stick=True, show_sphere=True, show_cartoon=False)
+        assert specs == [{'stick': {'radius': 0.15}, 'sphere': {'radius': 0.3}}]
+        
         # Test line style
         viewer.setStyle({}, {'line': {}})
         assert viewer.show_line == True
@@ -155,6 +227,245 @@ ATOM      6  C   CAF     1      -0.744  -0.037   0.000  1.00  0.00           C
         assert viewer.background_color == 'lightgray'
         assert viewer.structure == ""
 
+    def test_auto_label_method(self):
+        """Test autoLabel labels every atom with one labels update"""
+        viewer = Mol3DViewer()
+        viewer.addModel(self.benzene_xyz, 'xyz')
+        events = []
+        viewer.param.watch(events.append, 'labels')
+        
+        result = viewer.autoLabel()
+        assert result is viewer
+        assert len(events) == 1
+        assert [label['text'] for label in viewer.labels] == ['1', '2', '3', '4', '5', '6']
+        assert viewer.labels[1]['options']['position'] == {'x': 1.2098, 'y': 0.6985, 'z': 0.0}
+        assert viewer.labels[1]['options']['fontColor'] == 'blue'
+        
+        # PDB coordinates come from the fixed-width columns
+        viewer.removeAllLabels()
+        viewer.addModel(self.caffeine_pdb, 'pdb').autoLabel()
+        assert len(viewer.labels) == 6
+        assert viewer.labels[0]['options']['position'] == {'x': -0.744, 'y': 1.329, 'z': 0.0}
+        
+        # The parse is reused until the structure or filetype changes
+        coords = viewer._atom_coordinates()
+        assert viewer._atom_coordinates() is coords
+        viewer.addModel(self.benzene_xyz, 'xyz')
+        assert viewer._atom_coordinates() is not coords
+
+    def test_atom_coords_payload(self):
+        """Test atom label coordinates are parsed in Python only while labels are shown"""
+        import numpy as np
+        
+        viewer = Mol3DViewer()
+        viewer.addModel(self.benzene_xyz, 'xyz')
+        assert viewer._atom_coords == b""
+        
+        viewer.showAtomLabels(True)
+        coords = np.frombuffer(viewer._atom_coords, dtype='<f4').reshape(-1, 3)
+        assert coords.shape == (6, 3)
+        np.testing.assert_allclose(coords[1], [1.2098, 0.6985, 0.0], rtol=1e-6)
+        
+        # Follows structure changes and is cleared when labels are hidden
+        viewer.addModel(self.caffeine_pdb, 'pdb')
+        coords = np.frombuffer(viewer._atom_coords, dtype='<f4').reshape(-1, 3)
+        np.testing.assert_allclose(coords[0], [-0.744, 1.329, 0.0], rtol=1e-6)
+        viewer.showAtomLabels(False)
+        assert viewer._atom_coords == b""
+
+    def test_malformed_structure_with_atom_labels(self):
+        """Test unparseable atom lines drop the labels but still load the structure"""
+        bad_xyz = "2\nbad\nC 1 2 3\nH 1 2 x"
+        viewer = Mol3DViewer(structure=bad_xyz, show_atom_labels=True)
+        assert viewer._structure == bad_xyz.encode()
+        assert viewer._atom_coords == b""
+        
+        viewer.addModel(self.benzene_xyz, 'xyz')
+        assert len(viewer._atom_coords) == 6 * 12
+        
+        # A blank PDB coordinate column behaves the same
+        bad_pdb = self.caffeine_pdb.replace("1.329", "     ", 1)
+        viewer.addModel(bad_pdb, 'pdb')
+        assert viewer._structure == bad_pdb.encode()
+        assert viewer._atom_coords == b""
+
+    def test_add_labels_method(self):
+        """Test batched addLabels method"""
+        viewer = Mol3DViewer()
+        events = []
+        viewer.param.watch(events.append, 'labels')
+
+        result = viewer.addLabels([
+            {'text': '1', 'options': {'fontColor': 'blue'}},
+            {'text': '2', 'position': {'x': 1.0, 'y': 0.0, 'z': 0.0}, 'fontSize': 12},
+        ])
+        assert result is viewer  # Should return self for chaining
+        assert len(events) == 1  # One reactive update for the whole batch
+        assert viewer.labels == [
+            {'text': '1', 'options': {'fontColor': 'blue'}},
+            {'text': '2', 'options': {'position': {'x': 1.0, 'y': 0.0, 'z': 0.0}, 'fontSize': 12}},
+        ]
+
+        # Batched labels append to labels added one by one
+        viewer.addLabel('3')
+        assert [label['text'] for label in viewer.labels] == ['1', '2', '3']
+        
+        # addLabel calls inside batchLabels sync once when the block exits
+        events.clear()
+        with viewer.batchLabels():
+            viewer.addLabel('4')
+            viewer.addLabel('5', {'fontSize': 10})
+            assert len(events) == 0
+        assert len(events) == 1
+        assert [label['text'] for label in viewer.labels] == ['1', '2', '3', '4', '5']
+
+    def test_structure_payload(self):
+        """Test structure text is synced as a binary, gzip-compressed payload"""
+        import gzip
+        
+        viewer = Mol3DViewer()
+        viewer.addModel(self.benzene_xyz, "xyz")
+        assert viewer._structure == self.benzene_xyz.encode('utf-8')
+        
+        # Large structures are gzip-compressed
+        large_xyz = self.benzene_xyz * 200
+        viewer.structure = large_xyz
+        assert viewer._structure[:2] == b'\x1f\x8b'
+        assert len(viewer._structure) < len(large_xyz)
+        assert gzip.decompress(viewer._structure).decode('utf-8') == large_xyz
+        
+        viewer.clear()
+        assert viewer._structure == b""
+        
+        # Only the payload is part of the frontend data model
+        model = viewer.get_root()
+        assert '_structure' in model.data.properties_with_values()
+        assert 'structure' not in model.data.properties_with_values()
+    
+    def test_add_frames_lazy(self):
+        """Test large or non-XYZ frame sets are sent to the browser on request"""
+        import numpy as np
+        
+        frames = ["1\nFrame %d\nC %d.0 0.0 0.0" % (i, i) for i in range(3)]
+        viewer = Mol3DViewer()
+        viewer.addFrames(frames, 'xyz')
+        assert not viewer._lazy_frames
+        assert viewer.structure == "\n".join(frames)
+        
+        # Re-adding the same frames changes nothing, so nothing is resent
+        events = []
+        viewer.param.watch(lambda *changed: events.extend(changed),
+                           ['structure', 'total_frames', 'current_frame'])
+        viewer.addFrames(frames, 'xyz')
+        assert events == []
+        
+        viewer._lazy_frames_threshold = 0
+        viewer.addFrames(frames, 'xyz')
+        assert viewer._lazy_frames
+        assert viewer.structure == frames[0]
+        assert viewer.total_frames == 3
+        
+        # Panel forwards only the last request of a burst, so each request carries
+        # every frame the browser is missing and is answered in one payload
+        viewer._frame_request = [7, 1]
+        viewer._frame_request = [8, 2, 0, 5]
+        payload = viewer._frame_payload
+        header = np.frombuffer(payload[:24], dtype='<u4')
+        assert header.tolist() == [8, 2, 2, len(frames[2]), 0, len(frames[0])]
+        assert payload[24:].decode() == frames[2] + frames[0]
+        
+        # Small PDB frame sets are joined as MODEL records and loaded as frames
+        viewer._lazy_frames_threshold = Mol3DViewer._lazy_frames_threshold
+        viewer.addFrames([self.caffeine_pdb, self.caffeine_pdb + "END\n"], 'pdb')
+        assert not viewer._lazy_frames
+        assert viewer.filetype == 'pdb'
+        assert viewer.structure.startswith("MODEL        1\nATOM")
+        assert viewer.structure.count("ENDMDL") == 2
+        assert viewer.structure.splitlines().count("END") == 1
+        
+        # Atom labels cover the first model only, not every joined frame
+        viewer.showAtomLabels(True)
+        assert len(viewer._atom_coords) == 6 * 12
+        viewer.showAtomLabels(False)
+        
+        # Loading a single model leaves lazy frame mode
+        viewer.addModel(self.benzene_xyz, 'xyz')
+        assert not viewer._lazy_frames
+    
+    def test_add_trajectory_method(self):
+        """Test addTrajectory packs frames into a float32 buffer"""
+        import numpy as np
+        
+        viewer = Mol3DViewer()
+        viewer.addModel("test", "pdb")
+        coords = np.arange(2 * 3 * 3, dtype=float).reshape(2, 3, 3)
+        
+        result = viewer.addTrajectory(['O', 'H', 'H'], coords)
+        assert result is viewer  # Should return self for chaining
+        assert viewer.structure == ""
+        assert viewer.filetype == "xyz"
+        assert viewer.total_frames == 2
+        assert viewer.current_frame == 0
+        assert viewer._trajectory_symbols == ['O', 'H', 'H']
+        
+        decoded = np.frombuffer(viewer._trajectory, dtype='<f4')
+        np.testing.assert_array_equal(decoded.reshape(coords.shape), coords)
+        
+        # Loading a regular model replaces the trajectory
+        viewer.addModel("test", "xyz")
+        assert viewer._trajectory == b""
+        
+        with pytest.raises(ValueError):
+            viewer.addTrajectory(['O', 'H'], coords)
+        
+        # Quantized coordinates are int16 steps within each axis' extent
+        coords = np.random.default_rng(0).uniform(-20, 30, size=(4, 3, 3))
+        viewer.addTrajectory(['O', 'H', 'H'], coords, quantize=True)
+        offset, step = np.array(viewer._trajectory_scale[:3]), np.array(viewer._trajectory_scale[3:])
+        steps = np.frombuffer(viewer._trajectory, dtype='<i2').reshape(coords.shape)
+        assert len(viewer._trajectory) == coords.size * 2
+        np.testing.assert_allclose(offset + steps * step, coords, atol=step.max())
+        
+        # Same coordinates with new symbols: only the symbols change, in one batch
+        batches = []
+        viewer.param.watch(lambda *events: batches.append([e.name for e in events]),
+                           ['_trajectory', '_trajectory_symbols', '_trajectory_scale'])
+        viewer.addTrajectory(['N', 'H', 'H'], coords, quantize=True)
+        assert batches == [['_trajectory_symbols']]
+        assert '_trajectory_symbols' in viewer._scripts
+    
+    def test_clear_after_trajectory(self):
+        """Test clear() drops a trajectory even though structure is already empty"""
+        import numpy as np
+        
+        viewer = Mol3DViewer()
+        viewer.addTrajectory(['O', 'H', 'H'], np.zeros((4, 3, 3)), quantize=True)
+        viewer.clear()
+        assert viewer._trajectory == b""
+        assert viewer._trajectory_symbols == []
+        assert viewer._trajectory_scale == []
+        assert viewer.total_frames == 1
+        assert viewer.current_frame == 0
+    
+    def test_animation_methods(self):
+        """Test playback is driven by the animate/speed params and frames stay in range"""
+        viewer = Mol3DViewer()
+        viewer.addFrames([''.join(self.benzene_xyz)] * 3, "xyz")
+        assert viewer.frame_sync_interval == 100  # Browser keeps reporting frames during playback
+
+        assert viewer.startAnimation(speed=50) is viewer
+        assert viewer.animate == True
+        assert viewer.animation_speed == 50
+        assert viewer.animate_options == {'loop': 'forward'}
+
+        viewer.setFrame(2)
+        assert viewer.getFrame() == 2
+        viewer.setFrame(3)  # Out of range frames are ignored
+        assert viewer.getFrame() == 2
+
+        viewer.stopAnimation()
+        assert viewer.animate == False
+
     def test_render_method(self):
         """Test render method"""
         viewer = Mol3DViewer()
@@ -167,6 +478,24 @@ ATOM      6  C   CAF     1      -0.744  -0.037   0.000  1.00  0.00           C
         result = viewer.center()
         assert result is viewer  # Should return self for chaining
 
+    def test_render_center_do_not_resend_structure(self):
+        """Test render/center fire lightweight events instead of resending the structure"""
+        viewer = Mol3DViewer()
+        viewer.addModel(self.benzene_xyz, "xyz")
+        events = []
+        viewer.param.watch(lambda *e: events.extend(ev.name for ev in e),
+                           ['_structure', '_render_tick', '_center_tick'])
+        
+        viewer.render()
+        viewer.center()
+        assert events == ['_render_tick', '_center_tick']
+        
+        # Re-triggering or re-assigning identical structure data sends nothing new
+        events.clear()
+        viewer.param.trigger('structure')
+        viewer.structure = ''.join(self.benzene_xyz)
+        assert events == ['_center_tick']
+    
     def test_structure_formats(self):
         """Test loading different molecular formats"""
         viewer = Mol3DViewer()
@@ -219,13 +548,17 @@ ATOM      6  C   CAF     1      -0.744  -0.037   0.000  1.00  0.00           C
         
         # Check for essential script handlers
         essential_scripts = [
-            'render', 'structure', 'filetype', 'background_color',
-            'show_stick', 'show_sphere', 'show_cartoon', 'show_line', 'show_surface'
+            'render', 'structure', 'filetype', 'background_color', 'style_spec'
         ]
         for script in essential_scripts:
             assert script in viewer._scripts
             assert isinstance(viewer._scripts[script], str)
             assert len(viewer._scripts[script]) > 0
+        
+        # Scripts are sent without indentation, blank lines or comment-only lines
+        for script in viewer._scripts.values():
+            for line in script.splitlines():
+                assert line and line == line.strip() and not line.startswith('//')
     
     def test_javascript_pattern(self):
         """Test that JavaScript uses simplified working pattern"""
@@ -237,20 +570,18 @@ ATOM      6  C   CAF     1      -0.744  -0.037   0.000  1.00  0.00           C
         assert '$3Dmol.createViewer' in render_script
         assert 'state.viewer =' in render_script
         
-        # Check structure script has proper style handling
-        structure_script = viewer._scripts['structure']
-        assert 'state.viewer.clear()' in structure_script
-        assert 'state.viewer.addModel' in structure_script
-        assert 'state.viewer.setStyle' in structure_script
-        assert 'state.viewer.zoomTo()' in structure_script
-        assert 'state.viewer.render()' in structure_script
-        
-        # Check style scripts handle all visualization types
+        # Every browser-side param has a handler; style flags share style_spec's
+        for param_name in ['structure', 'filetype', 'style_spec', 'labels', 'show_atom_labels',
+                           'current_frame', 'animate', 'animation_speed', '_trajectory',
+                           '_trajectory_symbols', '_trajectory_scale', '_atom_coords',
+                           '_frame_payload', '_render_tick']:
+            assert param_name in viewer._scripts
         for style_param in ['show_stick', 'show_sphere', 'show_cartoon', 'show_line', 'show_surface']:
-            style_script = viewer._scripts[style_param]
-            assert 'state.viewer &&' in style_script
-            assert 'data.structure' in style_script
-            assert 'const style = {};' in style_script
+            assert style_param not in viewer._scripts
+        
+        # Template nodes are reached through Panel's bindings, never by global id
+        for script in viewer._scripts.values():
+            assert 'document.getElementById' not in script
 
 
 class TestViewFactory:
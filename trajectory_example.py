@@ -46,18 +46,21 @@ def create_demo_trajectory():
     """Create a simple demo trajectory"""
     frames = []
     
+    # One format string per frame instead of twelve f-string fields
+    frame_template = """5
+Methane trajectory frame %d
+C    0.000000    0.000000    0.000000
+H    %.6f    %.6f    %.6f
+H   %.6f   %.6f    %.6f
+H   %.6f    %.6f   %.6f
+H    %.6f   %.6f   %.6f"""
+    
     # Simple trajectory: methane molecule with varying C-H bonds
     for i in range(20):
         scale = 1.0 + 0.3 * (i / 19.0)  # Expand from 1.0 to 1.3
+        d = 0.629 * scale
         
-        frame = f"""5
-Methane trajectory frame {i+1}
-C    0.000000    0.000000    0.000000
-H    {0.629*scale:.6f}    {0.629*scale:.6f}    {0.629*scale:.6f}
-H   {-0.629*scale:.6f}   {-0.629*scale:.6f}    {0.629*scale:.6f}
-H   {-0.629*scale:.6f}    {0.629*scale:.6f}   {-0.629*scale:.6f}
-H    {0.629*scale:.6f}   {-0.629*scale:.6f}   {-0.629*scale:.6f}"""
-        
+        frame = frame_template % (i + 1, d, d, d, -d, -d, d, -d, d, -d, d, -d, -d)
         frames.append(frame)
     
     return frames
@@ -102,7 +105,8 @@ reset_btn = pn.widgets.Button(name="⏮️ Reset", button_type="light", width=10
 
 # Connect controls
 def update_frame(event):
-    viewer.setFrame(frame_slider.value)
+    # Watching value_throttled fires once on release instead of on every drag step
+    viewer.setFrame(event.new)
 
 def play_animation(event):
     viewer.setAnimationSpeed(speed_slider.value)
@@ -117,14 +121,14 @@ def reset_animation(event):
     frame_slider.value = 0
 
 def update_speed(event):
-    viewer.setAnimationSpeed(speed_slider.value)
+    viewer.setAnimationSpeed(event.new)
 
 # Register callbacks
-frame_slider.param.watch(update_frame, 'value')
+frame_slider.param.watch(update_frame, 'value_throttled')
 play_btn.on_click(play_animation)
 stop_btn.on_click(stop_animation)
 reset_btn.on_click(reset_animation)
-speed_slider.param.watch(update_speed, 'value')
+speed_slider.param.watch(update_speed, 'value_throttled')
 
 # Information panel
 info_panel = pn.pane.Markdown(f"""